@@ -0,0 +1,66 @@
+"""
+Lexer throughput benchmark: tokenizes sources with the ply lexer and the hand written scanner, checks both produce the
+same tokens and reports tokens per second for lexing alone and for a full parse.
+
+    python -m benchmarks.lexer_bench [--repeat 50] [files...]
+"""
+import argparse
+import gc
+import time
+
+from lexer.lexer import select_lexer, make_incc24_lexer
+from parser.parser import parse_expr, get_parser
+
+
+LEXERS = ('ply', 'scanner')
+
+
+def tokenize(source):
+    lexer = make_incc24_lexer()
+    lexer.input(source)
+    return list(iter(lexer.token, None))
+
+
+def timed(f, source):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        f(source)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Lexer throughput benchmark')
+    argparser.add_argument('files', nargs='*', default=['example.incc24', 'struct_sem.incc24'], help='sources to tokenize')
+    argparser.add_argument('--repeat', type=int, default=50, help='how often each source is repeated')
+    args = argparser.parse_args()
+
+    get_parser()
+    print(f'{"input":<24}{"tokens":>10}' + ''.join(f'{name + " lex":>16}{name + " parse":>16}' for name in LEXERS))
+    for path in args.files:
+        with open(path) as f:
+            text = f.read()
+        # a sequence of copies keeps the source parseable
+        source = '{' + ';\n'.join([text] * args.repeat) + '}'
+
+        streams = {}
+        results = []
+        for name in LEXERS:
+            select_lexer(name)
+            streams[name] = [(tok.type, tok.value, tok.lineno, tok.lexpos) for tok in tokenize(source)]
+            count = len(streams[name])
+            results.append(count / timed(tokenize, source))
+            results.append(count / timed(parse_expr, source))
+
+        if streams['ply'] != streams['scanner']:
+            first = next(i for i, (a, b) in enumerate(zip(streams['ply'], streams['scanner'])) if a != b)
+            raise AssertionError(f'token streams of {path} differ at token {first}')
+
+        print(f'{path:<24}{len(streams["ply"]):>10}' + ''.join(f'{rate / 1e3:9.0f} ktok/s' for rate in results))
+
+
+if __name__ == '__main__':
+    main()
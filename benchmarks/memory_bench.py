@@ -0,0 +1,54 @@
+"""
+Runtime memory benchmark: allocates many environments, call frames, closures and containers and reports the bytes
+each one takes, including everything it owns.
+
+    python -m benchmarks.memory_bench [--count 100000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from environment import Environment
+from interpreter.containers import Array, Set, Dictionary
+from interpreter.interpreter import Closure, CallCache
+from syntaxtree.syntaxtree import TrapExpression
+
+
+def measure(make, count):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = [make() for _ in range(count)]
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # the list holding the objects is not part of them
+    del objects
+    return (size - 8 * count) / count
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Runtime memory benchmark')
+    argparser.add_argument('--count', type=int, default=100000, help='number of objects allocated per kind')
+    args = argparser.parse_args()
+
+    root = Environment()
+    closure = Closure(root, ['a', 'b'], TrapExpression(0), False)
+    cache = CallCache(2)
+
+    inputs = {
+        'environment': lambda: root.push(),
+        'call frame (2 args)': lambda: cache.bind(closure, [1.0, 2.0]),
+        'closure': lambda: Closure(root, closure.arg_names, closure.body, False, None, closure.layout),
+        'array (empty)': lambda: Array([]),
+        'set (empty)': lambda: Set(set()),
+        'dictionary (empty)': lambda: Dictionary({}),
+    }
+
+    for name, make in inputs.items():
+        print(f'{name:<24}{measure(make, args.count):8.0f} bytes')
+
+
+if __name__ == '__main__':
+    main()
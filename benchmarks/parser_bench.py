@@ -0,0 +1,83 @@
+"""
+Parser scaling benchmark: parses generated programs of growing size and reports the time per element, which stays flat
+as long as the list productions of the grammar are linear.
+
+    python -m benchmarks.parser_bench [--max-size 100000]
+"""
+import argparse
+import gc
+import time
+
+from parser.parser import parse_expr, get_parser
+
+
+def sequence_source(n):
+    return '{ ' + '; '.join(f'x{i} = {i}' for i in range(n)) + ' }'
+
+
+def array_source(n):
+    return '[' + ', '.join(str(i) for i in range(n)) + ']'
+
+
+def dict_source(n):
+    return '{' + ', '.join(f'"k{i}": {i}' for i in range(n)) + '}'
+
+
+def call_source(n):
+    return 'f(' + ', '.join(f'a{i}' for i in range(n)) + ')'
+
+
+def lambda_source(n):
+    return '\\' + ', '.join(f'a{i}' for i in range(n)) + ' -> a0'
+
+
+def struct_source(n):
+    return 'struct { ' + '; '.join(f'.m{i} = {i}' for i in range(n)) + ' }'
+
+
+def local_source(n):
+    return 'local ' + ', '.join(f'v{i} = {i}' for i in range(n)) + ' in v0'
+
+
+INPUTS = {
+    'statements': sequence_source,
+    'array literal': array_source,
+    'dict literal': dict_source,
+    'call arguments': call_source,
+    'lambda parameters': lambda_source,
+    'struct members': struct_source,
+    'local bindings': local_source,
+}
+
+
+def measure(source):
+    # collecting the trees of earlier runs must not be charged to this one
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        parse_expr(source)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Parser scaling benchmark')
+    argparser.add_argument('--max-size', type=int, default=100000, help='largest number of elements')
+    args = argparser.parse_args()
+
+    sizes = [size for size in (1000, 10000, 100000, 1000000) if size <= args.max_size]
+    # load the parse tables and warm up before measuring
+    get_parser()
+    for make_source in INPUTS.values():
+        measure(make_source(100))
+
+    print(f'{"input":<20}' + ''.join(f'{size:>16}' for size in sizes) + f'{"growth":>10}')
+    for name, make_source in INPUTS.items():
+        per_element = [measure(make_source(size)) / size * 1e6 for size in sizes]
+        print(f'{name:<20}' + ''.join(f'{us:13.2f} us' for us in per_element) + f'{per_element[-1] / per_element[0]:9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,24 @@
 import os
 import subprocess
 
-from compiler.cma.ir_gen import code_r as cma_code_r
-from compiler.cma.x86_gen import x86_program as cma_x86_program, asm_gen as cma_asm_gen
-from compiler.mama.ir_gen import code_b as mama_code_b
-from compiler.mama.x86_gen import x86_program as mama_x86_program, asm_gen as mama_asm_gen
-from compiler.ima24.ir_gen import code_b as ima24_code_b
-from compiler.ima24.x86_gen import x86_program as ima24_x86_program, asm_gen as ima24_asm_gen
-
 from compiler.util import format_code
 from environment import Environment
-from parser.parser import parse_expr
+from optimizer.optimizer import optimize
+from parser.parser import parse_file
 
 
+# backends are imported on demand, a run only needs the one for the selected VM
 def ast_to_ir(ast, vm):
     env = Environment()
     match vm:
         case 'cma':
+            from compiler.cma.ir_gen import code_r as cma_code_r
             return cma_code_r(ast, env), env, None
         case 'mama':
+            from compiler.mama.ir_gen import code_b as mama_code_b
             return mama_code_b(ast, env, 0), env, None
         case 'ima24':
+            from compiler.ima24.ir_gen import code_b as ima24_code_b
             info = {'lb': dict()}
             return ima24_code_b(ast, env, 0, info), env, info['lb']
 
@@ -28,10 +26,13 @@ def ast_to_ir(ast, vm):
 def ir_to_asm(ir, env, lb, vm):
     match vm:
         case 'cma':
+            from compiler.cma.x86_gen import x86_program as cma_x86_program, asm_gen as cma_asm_gen
             return cma_x86_program(cma_asm_gen(ir), env)
         case 'mama':
+            from compiler.mama.x86_gen import x86_program as mama_x86_program, asm_gen as mama_asm_gen
             return mama_x86_program(mama_asm_gen(ir), env)
         case 'ima24':
+            from compiler.ima24.x86_gen import x86_program as ima24_x86_program, asm_gen as ima24_asm_gen
             return ima24_x86_program(ima24_asm_gen(ir), env, lb)
 
 
@@ -111,8 +112,10 @@ def main(args):
 
     # provide source as text
     if from_stage == 'src':
-        with open(args.file, 'r') as f:
-            ast = parse_expr(f.read())
+        ast = parse_file(args.file)
+
+        if args.optimize:
+            ast = optimize(ast, 'compiler')
 
         # convert source to intermediate representation
         ir, env, lb = ast_to_ir(ast, args.vm)
@@ -2,11 +2,11 @@ from dataclasses import dataclass
 from typing import Any, Self
 
 
-class Environment:
-    def __init__(self, parent=None):
-        self.parent = parent
-        self.containing_struct = parent.containing_struct if parent else None
-        self.vars = {}
+class Scope:
+    """
+    Name lookup shared by all environments, subclasses provide `vars`, `containing_struct` and any other state.
+    """
+    __slots__ = ('parent',)
 
     def __contains__(self, name):
         if name in self.vars:
@@ -28,8 +28,7 @@ class Environment:
         while env.parent is not None and name not in env.vars:
             env = env.parent
 
-        env.vars[name] = value
-
+        env.assign(name, value)
 
     def push(self, *names):
         env = Environment(self)
@@ -55,3 +54,93 @@ class Environment:
             return str(self.parent) + str(self.vars)
         else:
             return str(self.vars)
+
+
+class Environment(Scope):
+    """
+    Environment storing its variables in a dictionary.
+    """
+    __slots__ = ('containing_struct', 'vars')
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.containing_struct = parent.containing_struct if parent else None
+        self.vars = {}
+
+    def assign(self, name, value):
+        self.vars[name] = value
+
+
+class SharedEnvironment(Environment):
+    """
+    Environment whose variables are a dictionary shared with other environments, e.g. the builtins. It is copied on
+    the first assignment, so changes stay local to this environment.
+    """
+    __slots__ = ('shared',)
+
+    def __init__(self, parent, variables: dict):
+        super().__init__(parent)
+        self.vars = variables
+        self.shared = True
+
+    def assign(self, name, value):
+        if self.shared:
+            self.vars = dict(self.vars)
+            self.shared = False
+
+        self.vars[name] = value
+
+
+def make_layout(*names):
+    return {name: slot for slot, name in enumerate(names)}
+
+
+class FrameVars:
+    """
+    Dictionary like view on the slots of a `Frame`, used for lookups by name.
+    """
+    __slots__ = ('frame',)
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __contains__(self, name):
+        return name in self.frame.layout
+
+    def __getitem__(self, name):
+        return self.frame.slots[self.frame.layout[name]]
+
+    def __setitem__(self, name, value):
+        self.frame.slots[self.frame.layout[name]] = value
+
+    def items(self):
+        return zip(self.frame.layout, self.frame.slots)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class Frame(Scope):
+    """
+    Environment storing its variables in a list. The layout maps each name to its slot and is shared between all
+    frames of the same scope, variables resolved by `interpreter.resolver` are accessed by (depth, slot) directly.
+    Frames are created for every call, so they hold nothing else: the containing struct is looked up in the parent.
+    """
+    __slots__ = ('layout', 'slots')
+
+    def __init__(self, parent, layout, slots):
+        self.parent = parent
+        self.layout = layout
+        self.slots = slots
+
+    @property
+    def vars(self):
+        return FrameVars(self)
+
+    def assign(self, name, value):
+        self.slots[self.layout[name]] = value
+
+    @property
+    def containing_struct(self):
+        return self.parent.containing_struct if self.parent is not None else None
+
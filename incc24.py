@@ -1,12 +1,27 @@
 #! /usr/bin/python
 
+import time
+start_time = time.perf_counter()
+
 import argparse
+import sys
+
+from lexer.lexer import select_lexer
+from parser import cache
+
+
+def print_startup_profile(times):
+    from parser import parser
 
-from interpreter import interpreter
-from compiler import compiler
+    table_time = f'{parser.table_load_time * 1000:8.2f} ms' if parser.table_load_time is not None else '     not loaded'
+    print('startup profile:', file=sys.stderr)
+    for label, seconds in times:
+        print(f'  {label:<20}{seconds * 1000:8.2f} ms', file=sys.stderr)
+    print(f'  {"parse tables":<20}{table_time}', file=sys.stderr)
 
 if __name__ == '__main__':
     argparser = argparse.ArgumentParser(prog='InCC24', description='CLI tool for the InCC24 language')
+    argparser.add_argument('--startup-profile', action='store_true', help='Report import and parse table loading times on stderr')
 
     subparsers = argparser.add_subparsers(required=True, dest='action', title='Actions')
 
@@ -14,6 +29,12 @@ if __name__ == '__main__':
     action_interpret.add_argument('file', type=str, nargs='?', help='The file to interpret')
     action_interpret.add_argument('--repl', action='store_true', help='Run the interpreter in REPL mode')
     action_interpret.add_argument('--stop-on-error', action='store_true', help='Stop the repl on error')
+    action_interpret.add_argument('--engine', type=str, choices=['tree', 'closure', 'bytecode'], default='tree', help='which execution engine to use')
+    action_interpret.add_argument('--debug', action='store_true', help='Start the debugger before the first expression')
+    action_interpret.add_argument('--no-optimize', dest='optimize', action='store_false', help='Skip the AST optimization pass')
+    action_interpret.add_argument('--no-cache', dest='parse_cache', action='store_false', help='Neither read nor write parsed files in __incc24cache__')
+    action_interpret.add_argument('--lexer', type=str, choices=['ply', 'scanner'], default='ply', help='which lexer to tokenize sources with')
+    action_interpret.add_argument('--no-positions', dest='positions', action='store_false', help='Parse without tracking source lines, errors at runtime then only name the file')
 
     action_compile = subparsers.add_parser('compile', help='run the compiler', aliases=['c'])
     action_compile.add_argument('file', type=str, help='The file to compile')
@@ -21,18 +42,48 @@ if __name__ == '__main__':
     action_compile.add_argument('--vm', type=str, choices=['cma', 'mama', 'ima24'], default='ima24', help='which VM to use')
     action_compile.add_argument('--emit', '-e', choices=['ir', 'asm', 'obj', 'exe'], help='Determine output stage. If unspecified, output stage is determined by type of output file.')
     action_compile.add_argument('--keep-asm', action='store_true', help="don't delete the intermediate asm file")
+    action_compile.add_argument('--no-optimize', dest='optimize', action='store_false', help='Skip the AST optimization pass')
+    action_compile.add_argument('--no-cache', dest='parse_cache', action='store_false', help='Neither read nor write parsed files in __incc24cache__')
+    action_compile.add_argument('--lexer', type=str, choices=['ply', 'scanner'], default='ply', help='which lexer to tokenize sources with')
+    action_compile.add_argument('--no-positions', dest='positions', action='store_false', help='Parse without tracking source lines, errors at runtime then only name the file')
 
     args = argparser.parse_args()
+    cache.enabled = args.parse_cache
+    select_lexer(args.lexer)
+    times = [('cli setup', time.perf_counter() - start_time)]
 
     match args.action:
         case 'interpret' | 'i':
             if args.stop_on_error and not args.repl:
                 argparser.error('--stop-on-error requires --repl')
 
-            interpreter.main(args)
+            if args.debug and args.engine != 'tree':
+                argparser.error('--debug requires --engine=tree')
+
+            if args.debug and not args.positions:
+                argparser.error('--debug cannot be used with --no-positions')
+
+            import_start = time.perf_counter()
+            from interpreter import interpreter
+            times.append(('import interpreter', time.perf_counter() - import_start))
+            action = interpreter.main
 
         case 'compile' | 'c':
             if args.outfile == '-' and args.emit is None:
                 argparser.error('writing to stdout requires --emit')
 
-            compiler.main(args)
+            import_start = time.perf_counter()
+            from compiler import compiler
+            times.append(('import compiler', time.perf_counter() - import_start))
+            action = compiler.main
+
+    if not args.positions:
+        from parser import parser
+        parser.track_positions = False
+
+    try:
+        action(args)
+    finally:
+        if args.startup_profile:
+            times.append(('total incl. run', time.perf_counter() - start_time))
+            print_startup_profile(times)
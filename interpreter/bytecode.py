@@ -0,0 +1,390 @@
+import marshal
+from array import array
+
+from environment import make_layout
+from interpreter.operators import unary_operators, binary_operators
+from interpreter.interpreter import CallCache
+from interpreter.structs import MemberCache
+from syntaxtree.controlflow import LoopExpression, WhileExpression, DoWhileExpression, IfExpression
+from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression
+from syntaxtree.functions import LambdaExpression, CallExpression, ProcedureExpression
+from syntaxtree.module import ImportExpression
+from syntaxtree.operators import BinaryOperatorExpression, UnaryOperatorExpression
+from syntaxtree.positions import sources, intern_source, position_source, with_source
+from syntaxtree.sequences import SequenceExpression
+from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
+from syntaxtree.syntaxtree import Expression, TrapExpression, Program
+from syntaxtree.variables import AssignExpression, VariableExpression, LockExpression, LocalExpression
+
+
+# opcodes, the comment describes the operand
+CONST = 0           # index into the constant pool
+POP = 1
+LOAD_LOCAL = 2      # slot in the current frame
+LOAD_OUTER = 3      # depth << 16 | slot
+LOAD_NAME = 4       # constant (depth, name, position)
+STORE_LOCAL = 5     # slot in the current frame
+STORE_OUTER = 6     # depth << 16 | slot
+STORE_NAME = 7      # constant (depth, name)
+UNARY = 8           # index into UNARY_OPERATORS
+BINARY = 9          # index into BINARY_OPERATORS
+JUMP = 10           # target
+JUMP_IF_FALSE = 11  # target
+LOOP_NEXT = 12      # target when the counter on top of the stack is exhausted
+SET_RESULT = 13
+TO_INT = 14
+PUSH_FRAME = 15     # constant layout
+POP_FRAME = 16
+MAKE_CLOSURE = 17   # constant Function
+MAKE_PROCEDURE = 18 # constant Function
+CALL = 19           # constant CallCache
+RETURN = 20
+BUILD_ARRAY = 21    # number of elements
+BUILD_DICT = 22     # number of key value pairs
+STRUCT = 23         # constant (names, has_parent)
+END_STRUCT = 24
+MEMBER = 25         # constant MemberCache
+CHECK_MEMBER = 26   # constant (member, position)
+MEMBER_ASSIGN = 27  # constant member, follows the CHECK_MEMBER of the same member
+THIS = 28
+IMPORT = 29         # constant path
+TRAP = 30           # constant position
+
+UNARY_OPERATORS = tuple(unary_operators)
+BINARY_OPERATORS = tuple(binary_operators)
+
+# bump whenever opcodes, operator tables, the serialized layout or the code the compiler emits change, compiled code
+# cached in __incc24cache__ is keyed by it
+FORMAT_VERSION = 5
+
+
+class Code:
+    """
+    Compiled expression: parallel opcode and operand buffers plus the constant pool they refer to.
+    """
+
+    def __init__(self, ops: array, args: array, consts: list):
+        self.ops = ops
+        self.args = args
+        self.consts = consts
+
+
+class Function:
+    """
+    Constant describing a lambda or procedure, instantiated by MAKE_CLOSURE and MAKE_PROCEDURE.
+    """
+
+    def __init__(self, arg_names, rest_args, local_names, layout, code):
+        self.arg_names = arg_names
+        self.rest_args = rest_args
+        self.local_names = local_names
+        self.layout = layout
+        self.code = code
+
+
+class Assembler:
+    def __init__(self):
+        self.ops = array('B')
+        self.args = array('i')
+        self.consts = []
+        self.const_indices = {}
+
+    def emit(self, op, arg=0):
+        self.ops.append(op)
+        self.args.append(arg)
+        return len(self.ops) - 1
+
+    def const(self, value):
+        # 1.0 == True, so the type is part of the key. -0.0 == 0.0 as well, floats are told apart by their repr
+        if isinstance(value, (Function, MemberCache, CallCache, dict)):
+            key = id(value)
+        elif type(value) is float:
+            key = (float, repr(value))
+        else:
+            key = (type(value), value)
+        if key not in self.const_indices:
+            self.const_indices[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_indices[key]
+
+    def label(self):
+        return len(self.ops)
+
+    def patch(self, index, target):
+        self.args[index] = target
+
+    def code(self):
+        return Code(self.ops, self.args, self.consts)
+
+
+def compile_code(expr: Expression) -> Code:
+    """
+    Compile an expression annotated by `interpreter.resolver.resolve` to bytecode leaving its value on the stack.
+    """
+    asm = Assembler()
+    compile_expr(expr, asm)
+    asm.emit(RETURN)
+    return asm.code()
+
+
+def compile_function(arg_names, rest_args, local_names, layout, body):
+    if layout is None:
+        layout = make_layout(*arg_names, *(local_names or []))
+
+    return Function(tuple(arg_names), rest_args, tuple(local_names) if local_names is not None else None, layout, compile_code(body))
+
+
+def compile_store(var, asm):
+    match var.address:
+        case (0, int(slot)):
+            asm.emit(STORE_LOCAL, slot)
+        case (depth, int(slot)):
+            asm.emit(STORE_OUTER, depth << 16 | slot)
+        case (depth, None):
+            asm.emit(STORE_NAME, asm.const((depth, var.name)))
+        case None:
+            asm.emit(STORE_NAME, asm.const((0, var.name)))
+
+
+def compile_expr(expr: Expression, asm: Assembler):
+    match expr:
+        case Program(_, body):
+            compile_expr(body, asm)
+
+        case NumberLiteral(_, value): asm.emit(CONST, asm.const(float(value)))
+        case BoolLiteral(_, value): asm.emit(CONST, asm.const(value == 'TRUE'))
+        case StringLiteral(_, value): asm.emit(CONST, asm.const(value))
+        case CharLiteral(_, value): asm.emit(CONST, asm.const(value))
+        case ConstantExpression(_, value): asm.emit(CONST, asm.const(value))
+
+        case ArrayLiteral(_, elements):
+            for elem in elements:
+                compile_expr(elem, asm)
+            asm.emit(BUILD_ARRAY, len(elements))
+
+        case DictLiteral(_, elements):
+            for key, value in elements:
+                compile_expr(key, asm)
+                compile_expr(value, asm)
+            asm.emit(BUILD_DICT, len(elements))
+
+        case UnaryOperatorExpression(_, op, operand):
+            compile_expr(operand, asm)
+            asm.emit(UNARY, UNARY_OPERATORS.index(op))
+
+        case BinaryOperatorExpression(_, op, operands):
+            compile_expr(operands[0], asm)
+            compile_expr(operands[1], asm)
+            asm.emit(BINARY, BINARY_OPERATORS.index(op))
+
+        case AssignExpression(_, var, expression):
+            compile_expr(expression, asm)
+            compile_store(var, asm)
+
+        case VariableExpression(pos, name, address):
+            match address:
+                case (0, int(slot)):
+                    asm.emit(LOAD_LOCAL, slot)
+                case (depth, int(slot)):
+                    asm.emit(LOAD_OUTER, depth << 16 | slot)
+                case (depth, None):
+                    asm.emit(LOAD_NAME, asm.const((depth, name, pos)))
+                case None:
+                    asm.emit(LOAD_NAME, asm.const((0, name, pos)))
+
+        case LockExpression(_, _, body):
+            compile_expr(body, asm)
+
+        case LocalExpression(_, assignments, body, layout):
+            if layout is None:
+                layout = make_layout(*[assignment.var.name for assignment in assignments])
+
+            asm.emit(PUSH_FRAME, asm.const(layout))
+            for assignment in assignments:
+                compile_expr(assignment, asm)
+                asm.emit(POP)
+            compile_expr(body, asm)
+            asm.emit(POP_FRAME)
+
+        case SequenceExpression(_, expressions):
+            if not expressions:
+                asm.emit(CONST, asm.const(None))
+
+            for i, expression in enumerate(expressions):
+                if i > 0:
+                    asm.emit(POP)
+                compile_expr(expression, asm)
+
+        case LoopExpression(_, count, body):
+            # stack: result, remaining iterations
+            asm.emit(CONST, asm.const(None))
+            compile_expr(count, asm)
+            asm.emit(TO_INT)
+            loop_l = asm.label()
+            exit_jump = asm.emit(LOOP_NEXT)
+            compile_expr(body, asm)
+            asm.emit(SET_RESULT)
+            asm.emit(JUMP, loop_l)
+            asm.patch(exit_jump, asm.label())
+
+        case WhileExpression(_, condition, body):
+            asm.emit(CONST, asm.const(None))
+            while_l = asm.label()
+            compile_expr(condition, asm)
+            exit_jump = asm.emit(JUMP_IF_FALSE)
+            asm.emit(POP)
+            compile_expr(body, asm)
+            asm.emit(JUMP, while_l)
+            asm.patch(exit_jump, asm.label())
+
+        case DoWhileExpression(_, condition, body):
+            compile_expr(body, asm)
+            while_l = asm.label()
+            compile_expr(condition, asm)
+            exit_jump = asm.emit(JUMP_IF_FALSE)
+            asm.emit(POP)
+            compile_expr(body, asm)
+            asm.emit(JUMP, while_l)
+            asm.patch(exit_jump, asm.label())
+
+        case IfExpression(_, condition, then_body, else_body):
+            compile_expr(condition, asm)
+            else_jump = asm.emit(JUMP_IF_FALSE)
+            compile_expr(then_body, asm)
+            end_jump = asm.emit(JUMP)
+            asm.patch(else_jump, asm.label())
+            if else_body:
+                compile_expr(else_body, asm)
+            else:
+                asm.emit(CONST, asm.const(None))
+            asm.patch(end_jump, asm.label())
+
+        case LambdaExpression(_, arg_names, body, rest_args, layout):
+            asm.emit(MAKE_CLOSURE, asm.const(compile_function(arg_names, rest_args, None, layout, body)))
+
+        case ProcedureExpression(_, arg_names, local_names, body, layout):
+            asm.emit(MAKE_PROCEDURE, asm.const(compile_function(arg_names, False, local_names, layout, body)))
+
+        case CallExpression(_, f, arg_exprs):
+            compile_expr(f, asm)
+            for arg_expr in arg_exprs:
+                compile_expr(arg_expr, asm)
+            asm.emit(CALL, asm.const(CallCache(len(arg_exprs))))
+
+        case StructExpression(_, initializers, parent_expr):
+            if parent_expr:
+                compile_expr(parent_expr, asm)
+
+            asm.emit(STRUCT, asm.const((tuple(init_expr.name for init_expr in initializers), parent_expr is not None)))
+            for init_expr in initializers:
+                compile_expr(init_expr, asm)
+                asm.emit(POP)
+            asm.emit(END_STRUCT)
+
+        case MemberAccessExpression(pos, struct_expr, member, up_count):
+            compile_expr(struct_expr, asm)
+            asm.emit(MEMBER, asm.const(MemberCache(member, up_count, pos)))
+
+        case MemberAssignExpression(pos, member, value_expr):
+            asm.emit(CHECK_MEMBER, asm.const((member, pos)))
+            compile_expr(value_expr, asm)
+            asm.emit(MEMBER_ASSIGN, asm.const(member))
+
+        case ThisExpression(_):
+            asm.emit(THIS)
+
+        case ImportExpression(_, path):
+            asm.emit(IMPORT, asm.const(path))
+
+        case TrapExpression(pos):
+            asm.emit(TRAP, asm.const(pos))
+
+        case _:
+            raise NotImplementedError(expr)
+
+
+# how to rewrite the positions in the constant used by an opcode
+POSITION_CONSTS = {
+    LOAD_NAME: lambda const, relocate: (const[0], const[1], relocate(const[2])),
+    CHECK_MEMBER: lambda const, relocate: (const[0], relocate(const[1])),
+    TRAP: lambda const, relocate: relocate(const),
+}
+
+
+def relocate_positions(ops, args, consts, relocate):
+    """
+    Apply `relocate` to every position in `consts`, positions in MemberCaches are handled by the caller.
+    """
+    done = set()
+    for op, arg in zip(ops, args):
+        if op in POSITION_CONSTS and arg not in done:
+            done.add(arg)
+            consts[arg] = POSITION_CONSTS[op](consts[arg], relocate)
+
+
+def code_to_tuple(code: Code, source_indices: dict[int, int]):
+    """
+    Convert `code` into builtin values marshal can store. Source ids are process local, so positions refer to sources
+    by their index in `source_indices` instead.
+    """
+    def relocate(pos):
+        return with_source(pos, source_indices.setdefault(position_source(pos), len(source_indices)))
+
+    plain_consts = list(code.consts)
+    relocate_positions(code.ops, code.args, plain_consts, relocate)
+
+    consts = []
+    for const in plain_consts:
+        if isinstance(const, Function):
+            consts.append((1, (const.arg_names, const.rest_args, const.local_names, const.layout, code_to_tuple(const.code, source_indices))))
+        elif isinstance(const, MemberCache):
+            # only the access site is stored, the cache starts out empty
+            consts.append((2, (const.member, const.up_count, relocate(const.pos))))
+        elif isinstance(const, CallCache):
+            consts.append((3, const.argc))
+        else:
+            consts.append((0, const))
+
+    return code.ops.tobytes(), code.args.tobytes(), tuple(consts)
+
+
+def code_from_tuple(t, source_ids: list[int]) -> Code:
+    ops_bytes, args_bytes, tagged_consts = t
+
+    def relocate(pos):
+        return with_source(pos, source_ids[position_source(pos)])
+
+    ops = array('B')
+    ops.frombytes(ops_bytes)
+    args = array('i')
+    args.frombytes(args_bytes)
+
+    consts = []
+    for tag, const in tagged_consts:
+        if tag == 1:
+            arg_names, rest_args, local_names, layout, function_code = const
+            consts.append(Function(arg_names, rest_args, local_names, layout, code_from_tuple(function_code, source_ids)))
+        elif tag == 2:
+            member, up_count, pos = const
+            consts.append(MemberCache(member, up_count, relocate(pos)))
+        elif tag == 3:
+            consts.append(CallCache(const))
+        else:
+            consts.append(const)
+
+    relocate_positions(ops, args, consts, relocate)
+    return Code(ops, args, consts)
+
+
+def dumps(code: Code) -> bytes:
+    source_indices = {}
+    t = code_to_tuple(code, source_indices)
+    return marshal.dumps((FORMAT_VERSION, [sources[source] for source in source_indices], t))
+
+
+def loads(data: bytes) -> Code:
+    version, paths, t = marshal.loads(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f'bytecode format {version} is not supported, expected {FORMAT_VERSION}')
+
+    return code_from_tuple(t, [intern_source(path) for path in paths])
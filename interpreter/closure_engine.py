@@ -0,0 +1,335 @@
+from environment import Environment, Frame, make_layout
+from interpreter import interpreter
+from interpreter.containers import Dictionary, make_array
+from interpreter.interpreter import Closure, CallCache, push_built_ins, import_module
+from interpreter.operators import unary_operators, binary_operators
+from interpreter.resolver import resolve
+from interpreter.structs import make_struct, check_member, MemberCache
+from syntaxtree.controlflow import LoopExpression, WhileExpression, DoWhileExpression, IfExpression
+from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression
+from syntaxtree.functions import LambdaExpression, CallExpression, ProcedureExpression
+from syntaxtree.module import ImportExpression
+from syntaxtree.operators import BinaryOperatorExpression, UnaryOperatorExpression
+from syntaxtree.positions import format_position
+from syntaxtree.sequences import SequenceExpression
+from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
+from syntaxtree.syntaxtree import Expression, TrapExpression, Program
+from syntaxtree.variables import AssignExpression, VariableExpression, LockExpression, LocalExpression
+
+
+class TailCall:
+    """
+    Returned by a call in tail position instead of making it. Whoever ran the body that returned it makes the call,
+    so tail calls run in constant python stack like in the tree interpreter and the VM.
+    """
+    __slots__ = ('body', 'frame')
+
+    def __init__(self, body, frame):
+        self.body = body
+        self.frame = frame
+
+
+class CompiledClosure(Closure):
+    """
+    A closure whose body has already been translated by `compile_expr`.
+    """
+    __slots__ = ()
+
+    def run(self, frame):
+        result = self.body(frame)
+        while type(result) is TailCall:
+            result = result.body(result.frame)
+        return result
+
+
+def constant(value):
+    return lambda env: value
+
+
+def compile_expr(expr: Expression, tail: bool = False):
+    """
+    Translate `expr` into a python function taking an `Environment` and returning the value of `expr`.
+    All dispatching on node types, operators and literals happens here, once, instead of on every evaluation.
+    With `tail` the function belongs to the body of a closure and returns a `TailCall` for calls in tail position.
+    """
+    match expr:
+        case Program(_, expr): return compile_expr(expr, tail)
+
+        case NumberLiteral(_, value): return constant(float(value))
+        case BoolLiteral(_, value): return constant(value == 'TRUE')
+        case StringLiteral(_, value): return constant(value)
+        case CharLiteral(_, value): return constant(value)
+        case ConstantExpression(_, value): return constant(value)
+
+        case ArrayLiteral(_, elements):
+            element_fs = [compile_expr(elem) for elem in elements]
+            return lambda env: make_array(*[f(env) for f in element_fs])
+
+        case DictLiteral(_, elements):
+            element_fs = [(compile_expr(key), compile_expr(value)) for key, value in elements]
+            return lambda env: Dictionary({key_f(env): value_f(env) for key_f, value_f in element_fs})
+
+        case UnaryOperatorExpression(_, op, operand):
+            op_f = unary_operators[op]
+            operand_f = compile_expr(operand)
+            return lambda env: op_f(operand_f(env))
+
+        case BinaryOperatorExpression(_, op, operands):
+            op_f = binary_operators[op]
+            left_f = compile_expr(operands[0])
+            right_f = compile_expr(operands[1])
+            return lambda env: op_f(left_f(env), right_f(env))
+
+        case AssignExpression(_, var, expression):
+            name = var.name
+            value_f = compile_expr(expression)
+
+            match var.address:
+                case (0, int(slot)):
+                    def assign(env):
+                        res = env.slots[slot] = value_f(env)
+                        return res
+                case (depth, int(slot)):
+                    def assign(env):
+                        res = value_f(env)
+                        for _ in range(depth):
+                            env = env.parent
+                        env.slots[slot] = res
+                        return res
+                case (depth, None):
+                    def assign(env):
+                        res = value_f(env)
+                        for _ in range(depth):
+                            env = env.parent
+                        env[name] = res
+                        return res
+                case _:
+                    def assign(env):
+                        res = value_f(env)
+                        env[name] = res
+                        return res
+            return assign
+
+        case VariableExpression(pos, name, address):
+            match address:
+                case (0, int(slot)):
+                    return lambda env: env.slots[slot]
+                case (1, int(slot)):
+                    return lambda env: env.parent.slots[slot]
+                case (depth, int(slot)):
+                    def variable(env):
+                        for _ in range(depth):
+                            env = env.parent
+                        return env.slots[slot]
+                    return variable
+
+            depth = address[0] if address else 0
+
+            def variable(env):
+                for _ in range(depth):
+                    env = env.parent
+                try:
+                    return env[name]
+                except KeyError:
+                    raise KeyError(f"Unknown variable {name} in {format_position(pos)}")
+            return variable
+
+        case LockExpression(_, _, body):
+            return compile_expr(body, tail)
+
+        case LocalExpression(_, assignments, body, layout):
+            if layout is None:
+                layout = make_layout(*[assignment.var.name for assignment in assignments])
+            n = len(assignments)
+            assignment_fs = [compile_expr(assignment) for assignment in assignments]
+            body_f = compile_expr(body, tail)
+
+            def local(env):
+                env = Frame(env, layout, [None] * n)
+
+                for assignment_f in assignment_fs:
+                    assignment_f(env)
+
+                return body_f(env)
+            return local
+
+        case SequenceExpression(_, expressions):
+            if not expressions:
+                return constant(None)
+
+            expression_fs = [compile_expr(expression) for expression in expressions[:-1]]
+            last_f = compile_expr(expressions[-1], tail)
+
+            def sequence(env):
+                for expression_f in expression_fs:
+                    expression_f(env)
+                return last_f(env)
+            return sequence
+
+        case LoopExpression(_, count, body):
+            count_f = compile_expr(count)
+            body_f = compile_expr(body)
+
+            def loop(env):
+                result = None
+                for _ in range(int(count_f(env))):
+                    result = body_f(env)
+                return result
+            return loop
+
+        case WhileExpression(_, condition, body):
+            condition_f = compile_expr(condition)
+            body_f = compile_expr(body)
+
+            def while_loop(env):
+                result = None
+                while condition_f(env):
+                    result = body_f(env)
+                return result
+            return while_loop
+
+        case DoWhileExpression(_, condition, body):
+            condition_f = compile_expr(condition)
+            body_f = compile_expr(body)
+
+            def do_while_loop(env):
+                result = body_f(env)
+                while condition_f(env):
+                    result = body_f(env)
+                return result
+            return do_while_loop
+
+        case IfExpression(_, condition, then_body, else_body):
+            condition_f = compile_expr(condition)
+            then_f = compile_expr(then_body, tail)
+            else_f = compile_expr(else_body, tail) if else_body else constant(None)
+            return lambda env: then_f(env) if condition_f(env) else else_f(env)
+
+        case LambdaExpression(_, arg_names, body, rest_args, layout):
+            body_f = compile_expr(body, True)
+            return lambda env: CompiledClosure(env, arg_names, body_f, rest_args, None, layout)
+
+        case ProcedureExpression(_, arg_names, local_names, body, layout):
+            body_f = compile_expr(body, True)
+            return lambda env: CompiledClosure(push_built_ins(env.root()), arg_names, body_f, False, local_names, layout)
+
+        case CallExpression(_, f, arg_exprs):
+            callable_f = compile_expr(f)
+            arg_fs = [compile_expr(arg_expr) for arg_expr in arg_exprs]
+
+            bind = CallCache(len(arg_fs)).bind
+
+            if tail:
+                match arg_fs:
+                    case [arg_f]:
+                        def tail_call1(env):
+                            callable = callable_f(env)
+                            if type(callable) is CompiledClosure:
+                                return TailCall(callable.body, bind(callable, [arg_f(env)]))
+                            return callable(arg_f(env))
+                        return tail_call1
+                    case _:
+                        def tail_call(env):
+                            callable = callable_f(env)
+                            arg_values = [arg_f(env) for arg_f in arg_fs]
+                            if type(callable) is CompiledClosure:
+                                return TailCall(callable.body, bind(callable, arg_values))
+                            return callable(*arg_values)
+                        return tail_call
+
+            # the body of the callee returns a TailCall for each call it ends with, those are made here
+            match arg_fs:
+                case []:
+                    def call0(env):
+                        callable = callable_f(env)
+                        if type(callable) is CompiledClosure:
+                            result = callable.body(bind(callable, []))
+                            while type(result) is TailCall:
+                                result = result.body(result.frame)
+                            return result
+                        return callable()
+                    return call0
+                case [arg_f]:
+                    def call1(env):
+                        callable = callable_f(env)
+                        if type(callable) is CompiledClosure:
+                            result = callable.body(bind(callable, [arg_f(env)]))
+                            while type(result) is TailCall:
+                                result = result.body(result.frame)
+                            return result
+                        return callable(arg_f(env))
+                    return call1
+                case [arg0_f, arg1_f]:
+                    def call2(env):
+                        callable = callable_f(env)
+                        if type(callable) is CompiledClosure:
+                            result = callable.body(bind(callable, [arg0_f(env), arg1_f(env)]))
+                            while type(result) is TailCall:
+                                result = result.body(result.frame)
+                            return result
+                        return callable(arg0_f(env), arg1_f(env))
+                    return call2
+                case _:
+                    def call(env):
+                        callable = callable_f(env)
+                        arg_values = [arg_f(env) for arg_f in arg_fs]
+                        if type(callable) is CompiledClosure:
+                            result = callable.body(bind(callable, arg_values))
+                            while type(result) is TailCall:
+                                result = result.body(result.frame)
+                            return result
+                        return callable(*arg_values)
+                    return call
+
+        case StructExpression(_, initializers, parent_expr):
+            names = tuple(init_expr.name for init_expr in initializers)
+            initializer_fs = [compile_expr(init_expr) for init_expr in initializers]
+            parent_f = compile_expr(parent_expr) if parent_expr else None
+
+            def struct_expr(env):
+                struct = make_struct(names, parent_f(env) if parent_f else None)
+                env = env.push()
+                env.containing_struct = struct
+
+                for initializer_f in initializer_fs:
+                    initializer_f(env)
+
+                return struct
+            return struct_expr
+
+        case MemberAccessExpression(pos, struct_expr, member, up_count):
+            struct_f = compile_expr(struct_expr)
+            lookup = MemberCache(member, up_count, pos).lookup
+            return lambda env: lookup(struct_f(env))
+
+        case MemberAssignExpression(pos, member, value_expr):
+            value_f = compile_expr(value_expr)
+
+            def member_assign(env):
+                struct = env.containing_struct
+                slot = check_member(struct, member, pos)
+
+                val = value_f(env)
+                struct.slots[slot] = val
+                return val
+            return member_assign
+
+        case ThisExpression(_):
+            return lambda env: env.containing_struct
+
+        case ImportExpression(_, path):
+            return lambda env: import_module(path, run)
+
+        case TrapExpression(_):
+            def trap(env):
+                # single stepping needs the tree walking interpreter, so only stop at the trap itself
+                if not interpreter.dbg.stopped:
+                    interpreter.dbg.debugger_stop(expr, env)
+            return trap
+
+        case _:
+            raise NotImplementedError(expr)
+
+
+def run(expr: Expression, env: Environment):
+    return compile_expr(resolve(expr))(env)
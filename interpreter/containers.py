@@ -0,0 +1,301 @@
+from functools import cmp_to_key
+
+
+def fast_caller(f, argc):
+    """
+    `f` or an equivalent function that is faster to call many times with `argc` arguments.
+    """
+    caller = getattr(f, 'caller', None)
+    return caller(argc) if caller is not None else f
+
+
+class ContainerMethods:
+    """
+    Dictionary like view on the methods of a container, bound to it only when accessed.
+    """
+    __slots__ = ('container',)
+
+    def __init__(self, container):
+        self.container = container
+
+    def __contains__(self, name):
+        return name in self.container.methods
+
+    def __getitem__(self, name):
+        return self.container[name]
+
+    def items(self):
+        return ((name, self.container[name]) for name in sorted(self.container.methods))
+
+    def __repr__(self):
+        return repr(sorted(self.container.methods))
+
+
+class Container:
+    """
+    Base of the builtin collections. Their members are the python methods named in the per type `methods` table, so
+    an instance holds nothing but its payload. It answers lookups by name like an environment without a parent, which
+    also serves structs extending a container.
+    """
+    __slots__ = ()
+    methods = frozenset()
+    parent = None
+    containing_struct = None
+
+    def __contains__(self, name):
+        return name in self.methods
+
+    def __getitem__(self, name):
+        if name not in self.methods:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    @property
+    def vars(self):
+        return ContainerMethods(self)
+
+
+class Set(Container):
+    __slots__ = ('elements',)
+    methods = frozenset({'for_each', 'contains', 'size', 'union', 'intersect', 'difference'})
+    elements: set
+
+    def __init__(self, elements: set):
+        self.elements = elements
+
+    def for_each(self, f):
+        f = fast_caller(f, 1)
+        for val in self.elements:
+            f(val)
+
+    def contains(self, val):
+        return val in self.elements
+
+    def size(self):
+        return float(len(self.elements))
+
+    # the operators accept sets as well as the live key views of dictionaries on either side
+    def union(self, other):
+        return Set(self.elements | other.elements)
+
+    def intersect(self, other):
+        return Set(self.elements & other.elements)
+
+    def difference(self, other):
+        return Set(self.elements - other.elements)
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return repr(self.elements)
+
+
+class KeysView(Set):
+    """
+    The keys of a dictionary as a set, reflecting later changes of the dictionary without copying it.
+    """
+    __slots__ = ()
+
+    def for_each(self, f):
+        f = fast_caller(f, 1)
+        # f may change the dictionary
+        for val in list(self.elements):
+            f(val)
+
+    def __repr__(self):
+        return repr(set(self.elements))
+
+
+class ValuesView(Container):
+    """
+    The values of a dictionary, reflecting later changes of the dictionary without copying it.
+    """
+    __slots__ = ('elements',)
+    methods = frozenset({'for_each', 'contains', 'size'})
+
+    def __init__(self, elements):
+        self.elements = elements
+
+    def for_each(self, f):
+        f = fast_caller(f, 1)
+        for val in list(self.elements):
+            f(val)
+
+    def contains(self, val):
+        return val in self.elements
+
+    def size(self):
+        return float(len(self.elements))
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return repr(list(self.elements))
+
+
+class ItemsView(ValuesView):
+    """
+    The entries of a dictionary, `for_each` calls its function with key and value.
+    """
+    __slots__ = ()
+
+    def for_each(self, f):
+        f = fast_caller(f, 2)
+        for key, val in list(self.elements):
+            f(key, val)
+
+    def contains(self, key, val):
+        return (key, val) in self.elements
+
+    def __repr__(self):
+        return repr(dict(self.elements))
+
+
+class Array(Container):
+    __slots__ = ('elements',)
+    methods = frozenset({
+        'for_each', 'map', 'filter', 'fold', 'sort', 'sort_with', 'find', 'slice', 'concat', 'push', 'pop', 'length',
+    })
+    elements: list
+
+    def __init__(self, elements: list):
+        self.elements = elements
+
+    def element_list(self) -> list:
+        return self.elements
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def for_each(self, f):
+        f = fast_caller(f, 1)
+        for val in self.element_list():
+            f(val)
+
+    def map(self, f):
+        f = fast_caller(f, 1)
+        return Array([f(val) for val in self.element_list()])
+
+    def filter(self, predicate):
+        predicate = fast_caller(predicate, 1)
+        return Array([val for val in self.element_list() if predicate(val)])
+
+    def fold(self, f, initial):
+        f = fast_caller(f, 2)
+        acc = initial
+        for val in self.element_list():
+            acc = f(acc, val)
+        return acc
+
+    def sort(self, key=None):
+        """
+        New array of the elements in ascending order, of `key(element)` if a key function is given.
+        """
+        return Array(sorted(self.element_list(), key=key and fast_caller(key, 1)))
+
+    def sort_with(self, comparator):
+        """
+        New array of the elements ordered by `comparator(a, b)`, which returns a negative number if a comes first, a
+        positive one if b does and 0 if their order does not matter.
+        """
+        return Array(sorted(self.element_list(), key=cmp_to_key(fast_caller(comparator, 2))))
+
+    def find(self, predicate):
+        """
+        Index of the first element `predicate` holds for, -1 if there is none.
+        """
+        predicate = fast_caller(predicate, 1)
+        for i, val in enumerate(self.element_list()):
+            if predicate(val):
+                return float(i)
+        return -1.0
+
+    def slice(self, start, stop):
+        return Array(self.elements[int(start):int(stop)])
+
+    def concat(self, other):
+        return Array(self.element_list() + other.element_list())
+
+    def push(self, val):
+        self.elements.append(val)
+        return val
+
+    def pop(self):
+        return self.elements.pop()
+
+    def length(self):
+        return float(len(self.elements))
+
+    def get_element(self, i):
+        return self.elements[i]
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return repr(self.elements)
+
+
+class Dictionary(Container):
+    __slots__ = ('dictionary',)
+    methods = frozenset({
+        'update', 'keys', 'values', 'items', 'size', 'contains_key', 'update_or_insert', 'merge', 'filter_keys',
+    })
+    dictionary: dict
+
+    def __init__(self, dictionary: dict):
+        self.dictionary = dictionary
+
+    def update(self, key, val):
+        self.dictionary[key] = val
+        return self.dictionary[key]
+
+    def keys(self):
+        return KeysView(self.dictionary.keys())
+
+    def values(self):
+        return ValuesView(self.dictionary.values())
+
+    def items(self):
+        return ItemsView(self.dictionary.items())
+
+    def size(self):
+        return float(len(self.dictionary))
+
+    def contains_key(self, key):
+        return key in self.dictionary
+
+    def merge(self, other):
+        """
+        Add all entries of the dictionary `other`, replacing the values of keys present in both.
+        """
+        self.dictionary.update(other.dictionary)
+        return self
+
+    def filter_keys(self, predicate):
+        predicate = fast_caller(predicate, 1)
+        return Dictionary({key: val for key, val in self.dictionary.items() if predicate(key)})
+
+    def update_or_insert(self, key, on_present, on_absent):
+        if key in self.dictionary:
+            self.dictionary[key] = on_present(key, self.dictionary[key])
+        else:
+            self.dictionary[key] = on_absent(key)
+
+
+    def get_element(self, key):
+        if key not in self.dictionary:
+            raise KeyError(key)
+        return self.dictionary[key]
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return repr(self.dictionary)
+
+
+def make_array(*elem):
+    return Array(list(elem))
@@ -1,16 +1,22 @@
 from dataclasses import dataclass
 
-import numpy as np
-
 from lexer.lexer import make_incc24_lexer
 
-from environment import Environment
+from environment import Environment, SharedEnvironment, Frame, make_layout
+from interpreter.containers import Array, Dictionary, make_array
+from interpreter.lists import nil, cons, make_list, head, tail, length, concat, reverse, list_map
+from interpreter.modules import ModuleRegistry
+from interpreter.resolver import resolve
+from interpreter.streams import Stream, stream, stream_range, stream_count, lines
+from interpreter.structs import make_struct, check_member, MemberCache
+from optimizer.optimizer import optimize
 from parser.parser import parse_expr, parse_file
 from syntaxtree.controlflow import LoopExpression, WhileExpression, DoWhileExpression, IfExpression
-from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral
+from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression
 from syntaxtree.functions import LambdaExpression, CallExpression, ProcedureExpression
 from syntaxtree.module import ImportExpression
 from syntaxtree.operators import BinaryOperatorExpression, UnaryOperatorExpression
+from syntaxtree.positions import decode_position, format_position
 from syntaxtree.sequences import SequenceExpression
 from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
 
@@ -18,30 +24,50 @@ from syntaxtree.syntaxtree import Expression, TrapExpression, Program
 from syntaxtree.variables import AssignExpression, VariableExpression, LockExpression, LocalExpression
 
 
-@dataclass
+@dataclass(slots=True)
 class Closure:
     parent_env: Environment
     arg_names: list[str]
     body: Expression
     rest_args: bool
     local_names: list[str] = None
+    layout: dict[str, int] = None
 
-    def __call__(self, *arg_values):
-        if self.local_names is None:
-            env = self.parent_env.push(*self.arg_names)
-        else:
-            env = self.parent_env.push(*self.arg_names, *self.local_names)
+    def __post_init__(self):
+        if self.layout is None:
+            self.layout = make_layout(*self.arg_names, *(self.local_names or []))
+
+    def bind(self, arg_values):
+        n = len(self.arg_names)
+        slots = list(arg_values)
 
         if self.rest_args:
-            for i in range(len(self.arg_names) - 1):
-                env[self.arg_names[i]] = arg_values[i]
+            slots[n - 1:] = [make_array(*arg_values[n - 1:])]
+        elif len(slots) != n:
+            slots = (slots + [None] * n)[:n]
+
+        if self.local_names:
+            slots.extend([None] * len(self.local_names))
+
+        return Frame(self.parent_env, self.layout, slots)
+
+    def run(self, frame):
+        return eval(self.body, frame)
+
+    def __call__(self, *arg_values):
+        return self.run(self.bind(arg_values))
 
-            env[self.arg_names[-1]] = make_array(*arg_values[len(self.arg_names) - 1:])
-        else:
-            for arg_name, arg_value in zip(self.arg_names, arg_values):
-                env[arg_name] = arg_value
+    def caller(self, argc):
+        """
+        Function calling this closure with `argc` arguments, for builtins calling it many times. If the arguments can
+        become the frame's slots as they are, it skips the general argument handling of `bind`.
+        """
+        if self.rest_args or len(self.arg_names) != argc:
+            return self
 
-        return eval(self.body, env)
+        run, parent, layout = self.run, self.parent_env, self.layout
+        padding = [None] * len(self.local_names or [])
+        return lambda *arg_values: run(Frame(parent, layout, [*arg_values, *padding]))
 
     def __str__(self):
         return f'fun(' + ', '.join(map(str, self.arg_names)) + ('...' if self.rest_args else '') + ')'
@@ -50,242 +76,283 @@ class Closure:
         return str(self)
 
 
-class Set(Environment):
-    elements: set
+class CallCache:
+    """
+    Monomorphic inline cache of one call site. Closures created by the same lambda or procedure share their body, so
+    for the last body called here it remembers whether the argument list can become the frame's slots as is, which
+    skips the general argument handling of `Closure.bind`.
+    """
 
-    def __init__(self, elements: set):
-        super().__init__()
-        self.elements = elements
-        self.vars = {
-            'for_each': lambda f: self.for_each(f)
-        }
+    def __init__(self, argc):
+        self.argc = argc
+        self.body = None
+        self.direct = False
+        self.padding = []
 
-    def for_each(self, f):
-        for val in self.elements:
-            f(val)
+    def bind(self, closure, arg_values: list):
+        if closure.body is not self.body:
+            self.body = closure.body
+            self.direct = not closure.rest_args and len(closure.arg_names) == self.argc
+            self.padding = [None] * len(closure.local_names or [])
 
+        if not self.direct:
+            return closure.bind(arg_values)
 
-class Array(Environment):
-    elements: list
+        if self.padding:
+            arg_values += self.padding
+        return Frame(closure.parent_env, closure.layout, arg_values)
 
-    def __init__(self, elements: list):
-        super().__init__()
-        self.elements = elements
-        self.vars = {
-            'for_each': lambda f: self.for_each(f)
-        }
 
-    def for_each(self, f):
-        for val in self.elements:
-            f(val)
+def eval(expr: Expression, env: Environment):
+    # expressions in tail position are evaluated by the next iteration instead of a recursive call, so tail calls
+    # of closures run in constant python stack
+    while True:
+        match expr:
+            case Program(_, expr): pass
+
+            case ConstantExpression(_, value): return value
+            case NumberLiteral(_, value): return float(value)
+            case BoolLiteral(_, value): return value == 'TRUE'
+            case StringLiteral(_, value): return value
+            case CharLiteral(_, value): return value
+            case ArrayLiteral(_, elements): return make_array(*[eval(elem, env) for elem in elements])
+            case DictLiteral(_, elements): return Dictionary({eval(key, env) : eval(value, env) for key, value in elements})
+
+            case UnaryOperatorExpression(_, operator, operand):
+                val = eval(operand, env)
+
+                match operator:
+                    case '+': return +val
+                    case '-' : return -val
+                    case 'NOT': return not val
+
+            case BinaryOperatorExpression(_, operator, operands):
+                val0 = eval(operands[0], env)
+                val1 = eval(operands[1], env)
+
+                match operator:
+                    case '+': return val0 + val1
+                    case '-': return val0 - val1
+                    case '*': return val0 * val1
+                    case '/': return val0 / val1
+                    case '<': return val0 < val1
+                    case '>': return val0 > val1
+                    case '<=': return val0 <= val1
+                    case '>=': return val0 >= val1
+                    case '==': return val0 == val1
+                    case '!=': return val0 != val1
+                    case 'EQ': return val0 == val1
+                    case 'NEQ': return val0 != val1
+                    case 'XOR': return val0 != val1
+                    case 'AND': return val0 and val1
+                    case 'OR': return val0 or val1
+                    case 'NAND': return not (val0 and val1)
+                    case 'NOR': return not (val0 or val1)
+                    case 'IMP': return not val0 or val1
+                    case '[]':
+                        match val0:
+                            case Dictionary():
+                                return val0.get_element(val1)
+                            case Array():
+                                return val0.get_element(int(val1))
+                            case _:
+                                return val0[int(val1)]
+
+            case AssignExpression(_, var, expression):
+                res = eval(expression, env)
+
+                if var.address is not None:
+                    depth, slot = var.address
+                    for _ in range(depth):
+                        env = env.parent
+
+                    if slot is not None:
+                        env.slots[slot] = res
+                        return res
+
+                env[var.name] = res
+                return res
+
+            case VariableExpression(pos, name, address):
+                if address is not None:
+                    depth, slot = address
+                    for _ in range(depth):
+                        env = env.parent
+
+                    if slot is not None:
+                        return env.slots[slot]
+
+                if name not in env:
+                    raise KeyError(f"Unknown variable {name} in {format_position(pos)}")
+
+                return env[name]
+
+            case LockExpression(_, _, body):
+                expr = body
+
+            case LocalExpression(_, assignments, body, layout):
+                if layout is None:
+                    layout = make_layout(*[assignment.var.name for assignment in assignments])
+
+                env = Frame(env, layout, [None] * len(assignments))
+
+                for assignment in assignments:
+                    eval(assignment, env)
+
+                expr = body
+
+            case SequenceExpression(_, expressions):
+                if not expressions:
+                    return None
+
+                last = len(expressions) - 1
+                for i in range(last):
+                    eval(expressions[i], env)
+
+                expr = expressions[last]
+
+            case LoopExpression(_, count, body):
+                n = int(eval(count, env))
+
+                result = None
+                for _ in range(n):
+                    result = eval(body, env)
+                return result
+
+            case WhileExpression(_, condition, body):
+                result = None
+                while eval(condition, env):
+                    result = eval(body, env)
+                return result
+
+            case DoWhileExpression(_, condition, body):
+                result = eval(body, env)
+                while eval(condition, env):
+                    result = eval(body, env)
+                return result
+
+            case IfExpression(_, condition, then_body, else_body):
+                if eval(condition, env):
+                    expr = then_body
+                elif else_body:
+                    expr = else_body
+                else:
+                    return None
 
-    def get_element(self, i):
-        return self.elements[i]
+            case LambdaExpression(_, arg_names, body, rest_args, layout):
+                return Closure(env, arg_names, body, rest_args, None, layout)
 
+            case ProcedureExpression(_, arg_names, local_names, body, layout):
+                return Closure(push_built_ins(env.root()), arg_names, body, False, local_names, layout)
 
-class Dictionary(Environment):
-    dictionary: dict
+            case CallExpression(_, f, arg_exprs, cache):
+                callable = eval(f, env)
+                arg_values = [eval(arg_expr, env) for arg_expr in arg_exprs]
 
-    def __init__(self, dictionary: dict):
-        super().__init__()
-        self.dictionary = dictionary
-        self.vars = {
-            'update': lambda k, v: self.update(k, v),
-            'keys': lambda: Set(set(self.dictionary.keys())),
-            'contains_key': lambda x: x in self.dictionary,
-            'update_or_insert': lambda k, p, a: self.update_or_insert(k, p, a),
-        }
+                if type(callable) is not Closure:
+                    return callable(*arg_values)
 
-    def update(self, key, val):
-        self.dictionary[key] = val
-        return self.dictionary[key]
+                if cache is None:
+                    cache = expr.cache = CallCache(len(arg_exprs))
 
-    def update_or_insert(self, key, on_present, on_absent):
-        if key in self.dictionary:
-            self.dictionary[key] = on_present(key, self.dictionary[key])
-        else:
-            self.dictionary[key] = on_absent(key)
+                env = cache.bind(callable, arg_values)
+                expr = callable.body
 
+            case StructExpression(_, initializers, parent_expr):
+                names = tuple(init_expr.name for init_expr in initializers)
+                struct = make_struct(names, eval(parent_expr, env) if parent_expr else None)
+                env = env.push()
+                env.containing_struct = struct
 
-    def get_element(self, key):
-        if key not in self.dictionary:
-            raise KeyError(key)
-        return self.dictionary[key]
+                for init_expr in initializers:
+                    eval(init_expr, env)
 
-    def __str__(self):
-        return repr(self)
+                return struct
 
-    def __repr__(self):
-        return repr(self.dictionary)
+            case MemberAccessExpression(pos, struct_expr, member, up_count, cache):
+                if cache is None:
+                    cache = expr.cache = MemberCache(member, up_count, pos)
 
+                return cache.lookup(eval(struct_expr, env))
 
-def eval(expr: Expression, env: Environment):
-    global dbg
-    if dbg.should_stop(expr, env):
-        dbg.debugger_stop(expr, env)
+            case MemberAssignExpression(pos, member, value_expr):
+                struct = env.containing_struct
+                slot = check_member(struct, member, pos)
 
-    match expr:
-        case Program(_, expr): return eval(expr, env)
-
-        case NumberLiteral(_, value): return float(value)
-        case BoolLiteral(_, value): return value == 'TRUE'
-        case StringLiteral(_, value): return value
-        case CharLiteral(_, value): return value
-        case ArrayLiteral(_, elements): return make_array(*[eval(elem, env) for elem in elements])
-        case DictLiteral(_, elements): return Dictionary({eval(key, env) : eval(value, env) for key, value in elements})
-
-        case UnaryOperatorExpression(_, operator, operand):
-            val = eval(operand, env)
-
-            match operator:
-                case '+': return +val
-                case '-' : return -val
-                case 'NOT': return not val
-
-        case BinaryOperatorExpression(_, operator, operands):
-            val0 = eval(operands[0], env)
-            val1 = eval(operands[1], env)
-
-            match operator:
-                case '+': return val0 + val1
-                case '-': return val0 - val1
-                case '*': return val0 * val1
-                case '/': return val0 / val1
-                case '<': return val0 < val1
-                case '>': return val0 > val1
-                case '<=': return val0 <= val1
-                case '>=': return val0 >= val1
-                case '==': return val0 == val1
-                case '!=': return val0 != val1
-                case 'EQ': return val0 == val1
-                case 'NEQ': return val0 != val1
-                case 'XOR': return val0 != val1
-                case 'AND': return val0 and val1
-                case 'OR': return val0 or val1
-                case 'NAND': return not (val0 and val1)
-                case 'NOR': return not (val0 or val1)
-                case 'IMP': return not val0 or val1
-                case '[]':
-                    match val0:
-                        case Dictionary():
-                            return val0.get_element(val1)
-                        case Array():
-                            return val0.get_element(int(val1))
-                        case _:
-                            return val0[int(val1)]
-
-        case AssignExpression(_, var, expression):
-            res = eval(expression, env)
-            env[var.name] = res
-            return res
-
-        case VariableExpression(pos, name):
-            if name not in env:
-                raise KeyError(f"Unknown variable {name} in {pos[0]}:{pos[1]}")
-
-            return env[name]
-
-        case LockExpression(_, _, body):
-            return eval(body, env)
-
-        case LocalExpression(_, assignments, body):
-            env = env.push(*[assignment.var.name for assignment in assignments])
-
-            for assignment in assignments:
-                eval(assignment, env)
-
-            return eval(body, env)
-
-        case SequenceExpression(_, expressions):
-            result = None
-            for expression in expressions:
-                result = eval(expression, env)
-            return result
-
-        case LoopExpression(_, count, body):
-            n = int(eval(count, env))
-
-            result = None
-            for _ in range(n):
-                result = eval(body, env)
-            return result
+                val = eval(value_expr, env)
+                struct.slots[slot] = val
+                return val
 
-        case WhileExpression(_, condition, body):
-            result = None
-            while eval(condition, env):
-                result = eval(body, env)
-            return result
+            case ThisExpression(_):
+                return env.containing_struct
+
+            case ImportExpression(_, path):
+                return import_module(path, run)
+
+            case TrapExpression(_):
+                if not dbg.stopped:
+                    dbg.debugger_stop(expr, env)
 
-        case DoWhileExpression(_, condition, body):
-            result = eval(body, env)
-            while eval(condition, env):
-                result = eval(body, env)
-            return result
-
-        case IfExpression(_, condition, then_body, else_body):
-            if eval(condition, env):
-                return eval(then_body, env)
-            elif else_body:
-                return eval(else_body, env)
-            else:
                 return None
 
-        case LambdaExpression(_, arg_names, body, rest_args):
-            return Closure(env, arg_names, body, rest_args)
+            case _:
+                raise NotImplementedError(expr)
+
+        if eval is traced_eval:
+            # single stepping has to see every node
+            return eval(expr, env)
+
+
+untraced_eval = eval
+
+
+def traced_eval(expr: Expression, env: Environment):
+    if dbg.should_stop(expr, env):
+        dbg.debugger_stop(expr, env)
 
-        case ProcedureExpression(_, arg_names, local_names, body):
-            return Closure(define_built_ins(env.root().push()), arg_names, body, False, local_names)
+    return untraced_eval(expr, env)
 
-        case CallExpression(_, f, arg_exprs):
-            callable = eval(f, env)
-            arg_values = [eval(arg_expr, env) for arg_expr in arg_exprs]
-            return callable(*arg_values)
 
-        case StructExpression(_, initializers, parent_expr):
-            if parent_expr:
-                struct = eval(parent_expr, env).push()
-            else:
-                struct = Environment()
+def set_tracing(enabled: bool):
+    """
+    Select the implementation of `eval` used for all further evaluations. Only single stepping needs a check before
+    every node, traps stop the program on their own, so untraced evaluation is the default.
+    """
+    global eval
+    eval = traced_eval if enabled else untraced_eval
 
-            struct.vars = {init_expr.name: None for init_expr in initializers}
-            env = env.push()
-            env.containing_struct = struct
 
-            for init_expr in initializers:
-                eval(init_expr, env)
+def run(expr: Expression, env: Environment):
+    return eval(resolve(expr), env)
 
-            return struct
 
-        case MemberAccessExpression(pos, expr, member, up_count):
-            struct = eval(expr, env)
+optimizing = True
 
-            for _ in range(up_count):
-                struct = struct.parent
 
-            if member not in struct:
-                raise KeyError(f'Unknown member {member} in {pos[0]}:{pos[1]}')
+def prepare(expr: Expression) -> Expression:
+    return optimize(expr) if optimizing else expr
 
-            return struct[member]
 
-        case MemberAssignExpression(pos, member, expr):
-            if not env.containing_struct or member not in env.containing_struct.vars:
-                raise KeyError(f'Unknown member {member} in {pos[0]}:{pos[1]}')
+def parse_module(path: str) -> Expression:
+    return prepare(parse_file(path))
 
-            val = eval(expr, env)
-            env.containing_struct.vars[member] = val
-            return val
 
-        case ThisExpression(_):
-            return env.containing_struct
+modules = ModuleRegistry()
 
-        case ImportExpression(_, path):
-            return eval(parse_file(path), define_built_ins(Environment()))
 
-        case TrapExpression(_):
-            return None
+def module_evaluator(run):
+    return lambda path: run(parse_module(path), push_built_ins(Environment()))
 
-        case _:
-            raise NotImplementedError(expr)
+
+def import_module(path: str, run):
+    """
+    Value of the module at `path`, evaluated by `run` of the calling engine unless it is cached and unchanged.
+    """
+    return modules.load(path, module_evaluator(run))
+
+
+def reload_module(path: str):
+    return modules.reload(path, module_evaluator(run))
 
 
 class Debugger:
@@ -295,7 +362,8 @@ class Debugger:
         self.watching = {}
 
     def should_stop(self, expr, env):
-        return not self.stopped and (type(expr) == TrapExpression or self.stepping)
+        # traps are handled by eval itself, don't stop twice at them
+        return not self.stopped and self.stepping and type(expr) != TrapExpression
 
     def debugger_stop(self, expr, env):
         self.stepping = True
@@ -305,7 +373,8 @@ class Debugger:
             for text, e in self.watching.items():
                 print(text, '=', eval(e, env))
 
-            match input(f'{expr.position[0]} line {expr.position[1]}> ').split(' '):
+            path, line, _ = decode_position(expr.position)
+            match input(f'{path} line {line}> ').split(' '):
                 case ['s']:
                     break
                 case ['c']:
@@ -325,42 +394,10 @@ class Debugger:
                     print(eval(parse_expr(' '.join(text)), env))
 
         self.stopped = False
+        set_tracing(self.stepping)
 
 
-def cons(a, b):
-    return (a, b)
-
-
-def make_list(*elem):
-    if len(elem) == 0:
-        return ()
-    return cons(elem[0], make_list(*elem[1:]))
-
-
-def head(l):
-    return l[0]
-
-
-def tail(l):
-    return l[1]
-
-
-def concat(a, b):
-    return cons(head(a), concat(tail(a), b)) if a != () else b
-
-
-def reverse(a):
-    def rev(a, t):
-        return rev(tail(a), cons(head(a), t)) if a != () else t
-    return rev(a, ())
-
-
-def list_map(f, l):
-    return cons(f(head(l)), list_map(f, tail(l))) if l != () else ()
-
-
-def make_array(*elem):
-    return Array(list(elem))
+dbg = Debugger()
 
 
 def define(env, name, val):
@@ -384,6 +421,7 @@ def wrap_lexer(lexer):
     def lexer_next():
         nonlocal l
         t = l if l is not None else lexer.token()
+        l = None
 
         if t is None:
             return ()
@@ -395,51 +433,117 @@ def wrap_lexer(lexer):
         define(token_struct, 'lexpos', t.lexpos)
         return token_struct
 
+    def lexer_tokens():
+        def pull():
+            while lexer_has_next():
+                yield lexer_next()
+
+        return Stream(pull)
+
     define(lexer_struct, 'input', lexer_input)
     define(lexer_struct, 'next', lexer_next)
     define(lexer_struct, 'has_next', lexer_has_next)
+    define(lexer_struct, 'tokens', lexer_tokens)
 
     return lexer_struct
 
 
-def define_built_ins(env):
-    define(env, 'list', make_list)
-    define(env, 'cons', cons)
-    define(env, 'nil', ())
-    define(env, 'head', head)
-    define(env, 'tail', tail)
-    define(env, 'concat', concat)
-    define(env, 'reverse', reverse)
-    define(env, 'map', list_map)
-
-    define(env, 'array', lambda elements: make_array(*elements))
-
-    define(env, 'dict', lambda: Dictionary(dict()))
-
-    define(env, 'print', print)
-
-    define(env, 'make_incc24_lexer', lambda: wrap_lexer(make_incc24_lexer()))
-
-    return env
+def numeric_builtin(name):
+    """
+    Builtin calling `interpreter.numeric.<name>`, numpy is only imported once a program uses one of them.
+    """
+    def call(*args):
+        from interpreter import numeric
+        return getattr(numeric, name)(*args)
+
+    call.__name__ = name
+    return call
+
+
+array = numeric_builtin('array')
+num_array = numeric_builtin('num_array')
+zeros = numeric_builtin('zeros')
+ones = numeric_builtin('ones')
+arange = numeric_builtin('arange')
+num_sum = numeric_builtin('num_sum')
+dot = numeric_builtin('dot')
+map_num = numeric_builtin('map_num')
+
+# created once, every program, module and procedure sees them through its own `push_built_ins` layer
+built_ins = {
+    'list': make_list,
+    'cons': cons,
+    'nil': nil,
+    'head': head,
+    'tail': tail,
+    'concat': concat,
+    'reverse': reverse,
+    'map': list_map,
+    'length': length,
+
+    'array': array,
+    'num_array': num_array,
+    'zeros': zeros,
+    'ones': ones,
+    'arange': arange,
+    'sum': num_sum,
+    'dot': dot,
+    'map_num': map_num,
+
+    'dict': lambda: Dictionary(dict()),
+
+    'stream': stream,
+    'range': stream_range,
+    'count': stream_count,
+    'lines': lines,
+
+    'print': print,
+    'reload': reload_module,
+
+    'make_incc24_lexer': lambda: wrap_lexer(make_incc24_lexer()),
+}
+
+
+def push_built_ins(env):
+    """
+    Return a new environment on top of `env` defining the builtins. Assigning to a builtin only changes this layer.
+    """
+    return SharedEnvironment(env, built_ins)
 
 
 def main(args):
-    global dbg
+    global dbg, optimizing
+    optimizing = args.optimize
     global_vars = Environment()
-    env = define_built_ins(global_vars.push())
+    env = push_built_ins(global_vars)
+
+    def run_file(path, env):
+        return execute(parse_module(path), env)
+
+    match args.engine:
+        case 'tree':
+            execute = run
+        case 'closure':
+            from interpreter.closure_engine import run as execute
+        case 'bytecode':
+            # also caches the compiled code of the file
+            from interpreter.vm import run as execute, run_file
 
     dbg = Debugger()
+    if args.debug:
+        dbg.stepping = True
+        set_tracing(True)
+
     if args.file:
-        expr = parse_file(args.file)
-        res = eval(expr, env)
+        res = run_file(args.file, env)
         print(res)
 
     if args.repl:
         while True:
             try:
                 inp = input("> ")
-                expr = parse_expr(inp)
-                res = eval(expr, env)
+                expr = prepare(parse_expr(inp))
+                res = execute(expr, env)
                 print(res)
             except (EOFError, KeyboardInterrupt):
                 break
@@ -0,0 +1,116 @@
+nil = ()
+
+
+class Cons:
+    """
+    Cell of a linked list. Lists end in `nil`, proper lists cache their length in every cell.
+    Indexing, comparison and printing behave like the nested pairs (head, tail) used before.
+    """
+    __slots__ = ('head', 'tail', 'length')
+
+    def __init__(self, head, tail):
+        self.head = head
+        self.tail = tail
+
+        if type(tail) is Cons:
+            self.length = None if tail.length is None else tail.length + 1
+        else:
+            self.length = 1 if tail == nil else None
+
+    def __iter__(self):
+        l = self
+        while type(l) is Cons:
+            yield l.head
+            l = l.tail
+
+    def __len__(self):
+        if self.length is None:
+            raise TypeError('improper list has no length')
+        return self.length
+
+    def last_tail(self):
+        l = self
+        while type(l) is Cons:
+            l = l.tail
+        return l
+
+    def __getitem__(self, i):
+        match i:
+            case 0: return self.head
+            case 1: return self.tail
+            case _: raise IndexError(i)
+
+    def __eq__(self, other):
+        a, b = self, other
+        while type(a) is Cons and type(b) is Cons:
+            if a is b:
+                return True
+            if a.length != b.length or a.head != b.head:
+                return False
+            a, b = a.tail, b.tail
+
+        if type(a) is Cons or type(b) is Cons:
+            return False
+        return a == b
+
+    def __hash__(self):
+        return hash((tuple(self), self.last_tail()))
+
+    def __repr__(self):
+        parts = [repr(x) for x in self]
+        return ''.join('(' + part + ', ' for part in parts) + repr(self.last_tail()) + ')' * len(parts)
+
+    def __str__(self):
+        return repr(self)
+
+
+def from_iterable(elements, end=nil):
+    """
+    Build a list of `elements` followed by `end` without recursion.
+    """
+    if not isinstance(elements, (list, tuple, range)):
+        elements = list(elements)
+
+    l = end
+    for elem in reversed(elements):
+        l = Cons(elem, l)
+    return l
+
+
+def cons(a, b):
+    return Cons(a, b)
+
+
+def make_list(*elem):
+    return from_iterable(elem)
+
+
+def head(l):
+    if type(l) is not Cons:
+        raise IndexError('head of empty list')
+    return l.head
+
+
+def tail(l):
+    if type(l) is not Cons:
+        raise IndexError('tail of empty list')
+    return l.tail
+
+
+def length(l):
+    return float(len(l))
+
+
+def concat(a, b):
+    return from_iterable(a, b)
+
+
+def reverse(a):
+    l = nil
+    for elem in a:
+        l = Cons(elem, l)
+    return l
+
+
+def list_map(f, l):
+    return from_iterable([f(x) for x in l])
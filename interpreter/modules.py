@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+class ModuleEntry:
+    def __init__(self, mtime, size, digest, value, evaluate):
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+        self.value = value
+        self.evaluate = evaluate
+
+
+class ModuleRegistry:
+    """
+    Values of imported modules keyed by their resolved path. A module is evaluated again only if its file changed: an
+    unchanged mtime and size is trusted, otherwise the content hash decides.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def load(self, path, evaluate, force=False):
+        """
+        Return the value of the module at `path`, calling `evaluate(path)` if it is not cached or out of date.
+        """
+        key = os.path.realpath(path)
+        stat = os.stat(key)
+        entry = self.entries.get(key)
+
+        if entry is not None and not force:
+            if (entry.mtime, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                return entry.value
+
+            digest = file_digest(key)
+            if digest == entry.digest:
+                entry.mtime, entry.size = stat.st_mtime_ns, stat.st_size
+                return entry.value
+        else:
+            digest = file_digest(key)
+
+        value = evaluate(path)
+        self.entries[key] = ModuleEntry(stat.st_mtime_ns, stat.st_size, digest, value, evaluate)
+        return value
+
+    def reload(self, path, evaluate):
+        """
+        Evaluate the module at `path` again, with the same engine as before if it was imported already.
+        """
+        entry = self.entries.get(os.path.realpath(path))
+        return self.load(path, entry.evaluate if entry is not None else evaluate, force=True)
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,159 @@
+import numpy as np
+
+from interpreter.containers import Array, make_array, fast_caller
+
+
+def is_number(val):
+    return isinstance(val, (int, float)) and not isinstance(val, bool)
+
+
+class NumArray(Array):
+    """
+    Array of numbers backed by a float ndarray. Arithmetic operators work elementwise with numbers and other NumArrays,
+    so expressions like `2 * a + b` run in numpy instead of calling back into the interpreter per element.
+    """
+    __slots__ = ()
+    methods = Array.methods | {'sum', 'min', 'max', 'mean'}
+    elements: np.ndarray
+
+    def slice(self, start, stop):
+        return NumArray(self.elements[int(start):int(stop)].copy())
+
+    def buffer(self) -> np.ndarray:
+        # `elements` either owns its data or is a prefix of a larger buffer left by push and pop
+        base = self.elements.base
+        return self.elements if base is None else base
+
+    def push(self, val):
+        if not is_number(val):
+            # arrays created by `array` must accept anything a generic one does, so this one becomes generic
+            self.elements = self.elements.tolist() + [val]
+            self.__class__ = Array
+            return val
+
+        n = len(self.elements)
+        buffer = self.buffer()
+        if len(buffer) == n:
+            # grow by doubling, so pushing n numbers copies O(n) of them
+            buffer = np.empty(max(8, 2 * n))
+            buffer[:n] = self.elements
+        buffer[n] = val
+        self.elements = buffer[:n + 1]
+        return val
+
+    def pop(self):
+        n = len(self.elements)
+        if not n:
+            raise IndexError('pop from empty list')
+        val = float(self.elements[-1])
+        # keeps the buffer for the next push
+        self.elements = self.buffer()[:n - 1]
+        return val
+
+    def sum(self):
+        return float(self.elements.sum())
+
+    def min(self):
+        return float(self.elements.min())
+
+    def max(self):
+        return float(self.elements.max())
+
+    def mean(self):
+        return float(self.elements.mean())
+
+    def get_element(self, i):
+        return float(self.elements[i])
+
+    def element_list(self):
+        return self.elements.tolist()
+
+    def __iter__(self):
+        # python floats like element_list, without converting all of them first
+        return map(float, self.elements)
+
+    def binary(self, other, op):
+        match other:
+            case NumArray():
+                return NumArray(op(self.elements, other.elements))
+            case _ if is_number(other):
+                return NumArray(op(self.elements, other))
+            case _:
+                return NotImplemented
+
+    def __add__(self, other): return self.binary(other, np.add)
+    def __radd__(self, other): return self.binary(other, lambda a, b: np.add(b, a))
+    def __sub__(self, other): return self.binary(other, np.subtract)
+    def __rsub__(self, other): return self.binary(other, lambda a, b: np.subtract(b, a))
+    def __mul__(self, other): return self.binary(other, np.multiply)
+    def __rmul__(self, other): return self.binary(other, lambda a, b: np.multiply(b, a))
+    def __truediv__(self, other): return self.binary(other, np.true_divide)
+    def __rtruediv__(self, other): return self.binary(other, lambda a, b: np.true_divide(b, a))
+
+    def __neg__(self):
+        return NumArray(-self.elements)
+
+    def __pos__(self):
+        return self
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return repr(self.elements.tolist())
+
+
+def num_array(elements):
+    match elements:
+        case NumArray():
+            return NumArray(elements.elements.copy())
+        case Array():
+            return NumArray(np.array(elements.elements, dtype=float))
+        case _:
+            return NumArray(np.array(list(elements), dtype=float))
+
+
+def array(elements):
+    """
+    The `array` builtin: a NumArray if all elements are numbers, a generic Array otherwise.
+    """
+    elements = list(elements.elements if isinstance(elements, Array) else elements)
+
+    if elements and all(is_number(elem) for elem in elements):
+        return NumArray(np.array(elements, dtype=float))
+
+    return make_array(*elements)
+
+
+def map_num(f, a):
+    """
+    Apply `f` to every number of a NumArray. Arithmetic on whole arrays needs no callback, write `2 * a + 1` instead.
+    """
+    f = fast_caller(f, 1)
+    return NumArray(np.fromiter((f(val) for val in a.elements.tolist()), dtype=float, count=len(a.elements)))
+
+
+def num_sum(a):
+    match a:
+        case NumArray():
+            return float(a.elements.sum())
+        case Array():
+            return sum(a.elements)
+        case _:
+            return sum(a)
+
+
+def dot(a, b):
+    return float(np.dot(a.elements, b.elements))
+
+
+def zeros(n):
+    return NumArray(np.zeros(int(n)))
+
+
+def ones(n):
+    return NumArray(np.ones(int(n)))
+
+
+def arange(start, stop, step=1.0):
+    return NumArray(np.arange(start, stop, step, dtype=float))
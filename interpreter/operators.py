@@ -0,0 +1,42 @@
+import operator
+
+from interpreter.containers import Dictionary, Array
+
+
+def index(val0, val1):
+    match val0:
+        case Dictionary():
+            return val0.get_element(val1)
+        case Array():
+            return val0.get_element(int(val1))
+        case _:
+            return val0[int(val1)]
+
+
+unary_operators = {
+    '+': operator.pos,
+    '-': operator.neg,
+    'NOT': operator.not_,
+}
+
+binary_operators = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'EQ': operator.eq,
+    'NEQ': operator.ne,
+    'XOR': operator.ne,
+    'AND': lambda val0, val1: val0 and val1,
+    'OR': lambda val0, val1: val0 or val1,
+    'NAND': lambda val0, val1: not (val0 and val1),
+    'NOR': lambda val0, val1: not (val0 or val1),
+    'IMP': lambda val0, val1: not val0 or val1,
+    '[]': index,
+}
@@ -0,0 +1,121 @@
+from environment import make_layout
+from syntaxtree.controlflow import LoopExpression, WhileExpression, DoWhileExpression, IfExpression
+from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression
+from syntaxtree.functions import LambdaExpression, CallExpression, ProcedureExpression
+from syntaxtree.module import ImportExpression
+from syntaxtree.operators import BinaryOperatorExpression, UnaryOperatorExpression
+from syntaxtree.sequences import SequenceExpression
+from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
+from syntaxtree.syntaxtree import Expression, TrapExpression, Program
+from syntaxtree.variables import AssignExpression, VariableExpression, LockExpression, LocalExpression
+
+
+def resolve(expr: Expression, scopes: list[dict[str, int]] = None) -> Expression:
+    """
+    Annotate every variable reference in `expr` with its lexical address.
+
+    `scopes` holds the layouts of the frames the interpreter will have pushed when evaluating `expr`, innermost last.
+    A name bound in one of them gets (depth, slot), where depth counts the frames to walk up. Any other name can only
+    live in the builtins or the global environment, so it gets (len(scopes), None): the lookup skips all frames and
+    continues by name from there.
+    """
+    if scopes is None:
+        scopes = []
+
+    match expr:
+        case Program(_, body):
+            resolve(body, scopes)
+
+        case NumberLiteral() | BoolLiteral() | StringLiteral() | CharLiteral() | ConstantExpression():
+            pass
+
+        case ArrayLiteral(_, elements):
+            for elem in elements:
+                resolve(elem, scopes)
+
+        case DictLiteral(_, elements):
+            for key, value in elements:
+                resolve(key, scopes)
+                resolve(value, scopes)
+
+        case UnaryOperatorExpression(_, _, operand):
+            resolve(operand, scopes)
+
+        case BinaryOperatorExpression(_, _, operands):
+            resolve(operands[0], scopes)
+            resolve(operands[1], scopes)
+
+        case AssignExpression(_, var, expression):
+            resolve(var, scopes)
+            resolve(expression, scopes)
+
+        case VariableExpression(_, name):
+            expr.address = (len(scopes), None)
+            for depth, layout in enumerate(reversed(scopes)):
+                if name in layout:
+                    expr.address = (depth, layout[name])
+                    break
+
+        case LockExpression(_, _, body):
+            resolve(body, scopes)
+
+        case LocalExpression(_, assignments, body):
+            expr.layout = make_layout(*[assignment.var.name for assignment in assignments])
+            scopes = [*scopes, expr.layout]
+
+            for assignment in assignments:
+                resolve(assignment, scopes)
+            resolve(body, scopes)
+
+        case SequenceExpression(_, expressions):
+            for expression in expressions:
+                resolve(expression, scopes)
+
+        case LoopExpression(_, count, body):
+            resolve(count, scopes)
+            resolve(body, scopes)
+
+        case WhileExpression(_, condition, body) | DoWhileExpression(_, condition, body):
+            resolve(condition, scopes)
+            resolve(body, scopes)
+
+        case IfExpression(_, condition, then_body, else_body):
+            resolve(condition, scopes)
+            resolve(then_body, scopes)
+            if else_body: resolve(else_body, scopes)
+
+        case LambdaExpression(_, arg_names, body, _):
+            expr.layout = make_layout(*arg_names)
+            resolve(body, [*scopes, expr.layout])
+
+        case ProcedureExpression(_, arg_names, local_names, body):
+            # procedures only see the builtins and globals, not the enclosing scopes
+            expr.layout = make_layout(*arg_names, *local_names)
+            resolve(body, [expr.layout])
+
+        case CallExpression(_, f, arg_exprs):
+            resolve(f, scopes)
+            for arg_expr in arg_exprs:
+                resolve(arg_expr, scopes)
+
+        case StructExpression(_, initializers, parent_expr):
+            if parent_expr: resolve(parent_expr, scopes)
+
+            # initializers run in an empty environment carrying the struct
+            scopes = [*scopes, {}]
+            for initializer in initializers:
+                resolve(initializer, scopes)
+
+        case MemberAccessExpression(_, struct_expr, _, _):
+            resolve(struct_expr, scopes)
+
+        case MemberAssignExpression(_, _, value_expr):
+            resolve(value_expr, scopes)
+
+        case ThisExpression() | ImportExpression() | TrapExpression():
+            pass
+
+        case _:
+            raise NotImplementedError(expr)
+
+    return expr
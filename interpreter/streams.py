@@ -0,0 +1,124 @@
+from itertools import count, islice
+
+from interpreter.containers import Container, Array, Set, ValuesView, ItemsView, fast_caller
+from interpreter.lists import Cons, from_iterable, nil
+
+
+class Stream(Container):
+    """
+    Lazy sequence. `source` returns a new python iterator over the elements, `map`, `filter` and `take` only record a
+    stage. Operations like `fold` pull the elements through all stages one at a time, so no intermediate collection
+    is built and a stream can be larger than memory or infinite.
+    """
+    __slots__ = ('source', 'stages')
+    methods = frozenset({'map', 'filter', 'take', 'fold', 'for_each', 'count', 'to_array', 'to_list'})
+
+    def __init__(self, source, stages=()):
+        self.source = source
+        self.stages = stages
+
+    def __iter__(self):
+        elements = self.source()
+        for kind, arg in self.stages:
+            match kind:
+                case 'map': elements = map(arg, elements)
+                case 'filter': elements = filter(arg, elements)
+                case 'take': elements = islice(elements, arg)
+        return elements
+
+    def map(self, f):
+        return Stream(self.source, self.stages + (('map', fast_caller(f, 1)),))
+
+    def filter(self, predicate):
+        return Stream(self.source, self.stages + (('filter', fast_caller(predicate, 1)),))
+
+    def take(self, n):
+        return Stream(self.source, self.stages + (('take', int(n)),))
+
+    def fold(self, f, initial):
+        f = fast_caller(f, 2)
+        acc = initial
+        for val in self:
+            acc = f(acc, val)
+        return acc
+
+    def for_each(self, f):
+        f = fast_caller(f, 1)
+        for val in self:
+            f(val)
+
+    def count(self):
+        return float(sum(1 for _ in self))
+
+    def to_array(self):
+        return Array(list(self))
+
+    def to_list(self):
+        return from_iterable(self)
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return '<stream' + ''.join(f' {kind}' for kind, _ in self.stages) + '>'
+
+
+def stream(elements):
+    """
+    The `stream` builtin: a stream over an array, a list, a set or a view of a dictionary. Entries of a dictionary
+    are streamed as (key, value) pairs. The elements are read from the container as they are pulled, so a set or
+    dictionary must not change its size while it is streamed.
+    """
+    match elements:
+        case Stream():
+            return elements
+        case Array() | Cons():
+            return Stream(lambda: iter(elements))
+        case ItemsView():
+            return Stream(lambda: (Cons(key, val) for key, val in elements.elements))
+        case Set() | ValuesView():
+            return Stream(lambda: iter(elements.elements))
+        case _ if elements == nil:
+            return Stream(lambda: iter(()))
+        case _:
+            raise TypeError(f'cannot stream {elements}')
+
+
+def stream_range(start, stop=None, step=1.0):
+    """
+    The `range` builtin: the numbers from `start` below `stop` in steps of `step` like python's range, `range(n)`
+    counts from 0 below n.
+    """
+    if stop is None:
+        start, stop = 0.0, start
+    if step == 0:
+        raise ValueError('range() arg 3 must not be zero')
+
+    def numbers():
+        # computed from the index, adding up the steps would accumulate rounding errors
+        for i in count():
+            val = start + i * step
+            if not (val < stop if step > 0 else val > stop):
+                return
+            yield val
+
+    return Stream(numbers)
+
+
+def stream_count(start=0.0, step=1.0):
+    """
+    The `count` builtin: the endless numbers from `start` in steps of `step`.
+    """
+    return Stream(lambda: (start + i * step for i in count()))
+
+
+def lines(path):
+    """
+    The `lines` builtin: the lines of the file at `path` without line breaks, read as they are pulled.
+    """
+    def read():
+        with open(path) as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+    return Stream(read)
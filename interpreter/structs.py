@@ -0,0 +1,129 @@
+from environment import Frame, make_layout
+from syntaxtree.positions import format_position
+
+
+class Shape:
+    """
+    Member layout shared by all structs created by the same struct expression from parents of the same shape.
+    `parent` is the shape of the struct that was extended, so the position of a member, own or inherited, only
+    depends on the shape and can be cached per shape.
+    """
+
+    def __init__(self, names: tuple[str, ...], parent: 'Shape | None'):
+        self.names = names
+        self.layout = make_layout(*names)
+        self.parent = parent
+        self.extensions = {}
+        self.members = {}
+
+    def extend(self, names: tuple[str, ...]) -> 'Shape':
+        shape = self.extensions.get(names)
+        if shape is None:
+            shape = self.extensions[names] = Shape(names, self)
+        return shape
+
+    def find(self, member: str) -> tuple[int, int] | None:
+        """
+        Return (depth, slot) of `member`, where depth counts the parents to walk up, or None if the member is not part
+        of the struct chain described by this shape.
+        """
+        if member in self.members:
+            return self.members[member]
+
+        shape, depth = self, 0
+        while shape is not None and member not in shape.layout:
+            shape, depth = shape.parent, depth + 1
+
+        self.members[member] = (depth, shape.layout[member]) if shape is not None else None
+        return self.members[member]
+
+
+# shapes of structs without a parent struct, keyed by member names
+root_shapes = {}
+
+
+def shape_for(names: tuple[str, ...], parent) -> Shape:
+    if type(parent) is Struct:
+        return parent.shape.extend(names)
+
+    # extending something that is not a struct (e.g. an array) is resolved by name beyond the own members
+    shape = root_shapes.get(names)
+    if shape is None:
+        shape = root_shapes[names] = Shape(names, None)
+    return shape
+
+
+class Struct(Frame):
+    """
+    Struct instance, the member values live in slots described by the shape.
+    """
+    __slots__ = ('shape',)
+
+    def __init__(self, shape: Shape, parent=None):
+        super().__init__(parent, shape.layout, [None] * len(shape.names))
+        self.shape = shape
+
+
+def make_struct(names: tuple[str, ...], parent=None) -> Struct:
+    return Struct(shape_for(names, parent), parent)
+
+
+def get_member(struct, member, pos):
+    """
+    Uncached member lookup by name, used for non-struct values and on inline cache misses that `Shape.find` cannot
+    resolve.
+    """
+    if member not in struct:
+        raise KeyError(f'Unknown member {member} in {format_position(pos)}')
+
+    return struct[member]
+
+
+class MemberCache:
+    """
+    Monomorphic inline cache of one member access site: remembers where `member` lives for the last struct shape seen,
+    so repeated accesses on structs of that shape skip the lookup by name.
+    """
+
+    def __init__(self, member, up_count, pos):
+        self.member = member
+        self.up_count = up_count
+        self.pos = pos
+        self.shape = None
+        self.depth = 0
+        self.slot = 0
+
+    def lookup(self, struct):
+        for _ in range(self.up_count):
+            struct = struct.parent
+
+        if type(struct) is not Struct or struct.shape is not self.shape:
+            return self.miss(struct)
+
+        for _ in range(self.depth):
+            struct = struct.parent
+        return struct.slots[self.slot]
+
+    def miss(self, struct):
+        if type(struct) is not Struct:
+            return get_member(struct, self.member, self.pos)
+
+        found = struct.shape.find(self.member)
+        if found is None:
+            return get_member(struct, self.member, self.pos)
+
+        self.shape = struct.shape
+        self.depth, self.slot = found
+        for _ in range(self.depth):
+            struct = struct.parent
+        return struct.slots[self.slot]
+
+
+def check_member(struct, member, pos):
+    """
+    Return the slot of the own member `member` of the struct under construction.
+    """
+    if struct is None or member not in struct.layout:
+        raise KeyError(f'Unknown member {member} in {format_position(pos)}')
+
+    return struct.layout[member]
@@ -0,0 +1,230 @@
+import hashlib
+
+from environment import Environment, Frame
+from interpreter import interpreter
+from interpreter.bytecode import *
+from interpreter.containers import Dictionary, make_array
+from interpreter.interpreter import Closure, push_built_ins, parse_module, modules
+from interpreter.operators import unary_operators, binary_operators
+from interpreter.resolver import resolve
+from interpreter.structs import make_struct, check_member
+from parser import cache
+from parser.parser import file_digest
+from syntaxtree.positions import format_position
+from syntaxtree.syntaxtree import Expression, TrapExpression
+
+unary_fs = tuple(unary_operators[op] for op in UNARY_OPERATORS)
+binary_fs = tuple(binary_operators[op] for op in BINARY_OPERATORS)
+
+
+class VMClosure(Closure):
+    """
+    A closure whose body is a `Code` object run by the VM.
+    """
+    __slots__ = ()
+
+    def run(self, frame):
+        return execute(self.body, frame)
+
+
+def execute(code: Code, env: Environment):
+    ops, args, consts = code.ops, code.args, code.consts
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    # saved (ops, args, consts, pc, env) of the callers, calls between VM closures don't recurse in python
+    calls = []
+    pc = 0
+
+    while True:
+        op = ops[pc]
+        arg = args[pc]
+        pc += 1
+
+        if op == LOAD_LOCAL:
+            push(env.slots[arg])
+
+        elif op == CONST:
+            push(consts[arg])
+
+        elif op == BINARY:
+            val1 = pop()
+            stack[-1] = binary_fs[arg](stack[-1], val1)
+
+        elif op == LOAD_OUTER:
+            e = env
+            for _ in range(arg >> 16):
+                e = e.parent
+            push(e.slots[arg & 0xFFFF])
+
+        elif op == LOAD_NAME:
+            depth, name, pos = consts[arg]
+            e = env
+            for _ in range(depth):
+                e = e.parent
+            if name not in e:
+                raise KeyError(f"Unknown variable {name} in {format_position(pos)}")
+            push(e[name])
+
+        elif op == JUMP_IF_FALSE:
+            if not pop():
+                pc = arg
+
+        elif op == JUMP:
+            pc = arg
+
+        elif op == POP:
+            pop()
+
+        elif op == CALL:
+            cache = consts[arg]
+            argc = cache.argc
+            if argc:
+                arg_values = stack[-argc:]
+                del stack[-argc:]
+            else:
+                arg_values = []
+            callable = pop()
+
+            if type(callable) is not VMClosure:
+                push(callable(*arg_values))
+            else:
+                # a call in tail position replaces the current activation instead of growing the call stack
+                tail = pc
+                while ops[tail] == JUMP or ops[tail] == POP_FRAME:
+                    tail = args[tail] if ops[tail] == JUMP else tail + 1
+
+                if ops[tail] != RETURN:
+                    calls.append((ops, args, consts, pc, env))
+
+                env = cache.bind(callable, arg_values)
+                code = callable.body
+                ops, args, consts = code.ops, code.args, code.consts
+                pc = 0
+
+        elif op == RETURN:
+            if not calls:
+                return pop()
+
+            ops, args, consts, pc, env = calls.pop()
+
+        elif op == STORE_LOCAL:
+            env.slots[arg] = stack[-1]
+
+        elif op == STORE_OUTER:
+            e = env
+            for _ in range(arg >> 16):
+                e = e.parent
+            e.slots[arg & 0xFFFF] = stack[-1]
+
+        elif op == STORE_NAME:
+            depth, name = consts[arg]
+            e = env
+            for _ in range(depth):
+                e = e.parent
+            e[name] = stack[-1]
+
+        elif op == UNARY:
+            stack[-1] = unary_fs[arg](stack[-1])
+
+        elif op == LOOP_NEXT:
+            if stack[-1] <= 0:
+                pop()
+                pc = arg
+            else:
+                stack[-1] -= 1
+
+        elif op == SET_RESULT:
+            stack[-2] = pop()
+
+        elif op == TO_INT:
+            stack[-1] = int(stack[-1])
+
+        elif op == PUSH_FRAME:
+            layout = consts[arg]
+            env = Frame(env, layout, [None] * len(layout))
+
+        elif op == POP_FRAME:
+            env = env.parent
+
+        elif op == MAKE_CLOSURE:
+            function = consts[arg]
+            push(VMClosure(env, function.arg_names, function.code, function.rest_args, None, function.layout))
+
+        elif op == MAKE_PROCEDURE:
+            function = consts[arg]
+            push(VMClosure(push_built_ins(env.root()), function.arg_names, function.code, False, function.local_names, function.layout))
+
+        elif op == BUILD_ARRAY:
+            elements = stack[len(stack) - arg:]
+            del stack[len(stack) - arg:]
+            push(make_array(*elements))
+
+        elif op == BUILD_DICT:
+            elements = stack[len(stack) - 2 * arg:]
+            del stack[len(stack) - 2 * arg:]
+            push(Dictionary({elements[i]: elements[i + 1] for i in range(0, len(elements), 2)}))
+
+        elif op == STRUCT:
+            names, has_parent = consts[arg]
+            struct = make_struct(names, pop() if has_parent else None)
+            push(struct)
+            env = env.push()
+            env.containing_struct = struct
+
+        elif op == END_STRUCT:
+            env = env.parent
+
+        elif op == MEMBER:
+            stack[-1] = consts[arg].lookup(stack[-1])
+
+        elif op == CHECK_MEMBER:
+            member, pos = consts[arg]
+            check_member(env.containing_struct, member, pos)
+
+        elif op == MEMBER_ASSIGN:
+            struct = env.containing_struct
+            struct.slots[struct.layout[consts[arg]]] = stack[-1]
+
+        elif op == THIS:
+            push(env.containing_struct)
+
+        elif op == IMPORT:
+            push(modules.load(consts[arg], evaluate_module))
+
+        elif op == TRAP:
+            if not interpreter.dbg.stopped:
+                interpreter.dbg.debugger_stop(TrapExpression(consts[arg]), env)
+            push(None)
+
+        else:
+            raise NotImplementedError(op)
+
+
+def run(expr: Expression, env: Environment):
+    return execute(compile_code(resolve(expr)), env)
+
+
+def load_code(path: str) -> Code:
+    """
+    Compiled code of the file at `path`, read from `__incc24cache__` if it was compiled from the same source before.
+    """
+    with open(path) as f:
+        text = f.read()
+
+    # the key of the syntax tree covers source, grammar and positions, the optimizer and the bytecode format change the
+    # code as well
+    digest = hashlib.sha256(b'%d %d ' % (FORMAT_VERSION, interpreter.optimizing) + file_digest(path, text)).digest()
+    code = cache.load(path, digest, '.bc', loads)
+    if code is None:
+        code = compile_code(resolve(parse_module(path)))
+        cache.store(path, digest, code, '.bc', dumps)
+    return code
+
+
+def run_file(path: str, env: Environment):
+    return execute(load_code(path), env)
+
+
+def evaluate_module(path: str):
+    return run_file(path, push_built_ins(Environment()))
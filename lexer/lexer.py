@@ -1,4 +1,5 @@
-from ply import lex
+import sys
+import threading
 
 from lexer.literals import *
 from lexer.operators import *
@@ -45,6 +46,8 @@ def t_IDENT(t):
         t.type = valUp
         t.value = valUp
 
+    # names end up in many syntax tree nodes, interned they are stored once and compare by identity
+    t.value = sys.intern(t.value)
     return t
 
 
@@ -63,8 +66,68 @@ def t_error(t):
     raise SyntaxError(f"Illegal character '{t.value[0]}'")
 
 
+# 'ply' or the hand written 'scanner' of lexer.scanner, both produce the same tokens
+kind = 'ply'
+# lexer built from the rules above, all others are clones sharing its compiled master regex
+prototype = None
+# lexers returned by finished parses, ready to be checked out again
+pool = []
+pool_lock = threading.Lock()
+
+
+def select_lexer(name):
+    """
+    Choose which lexer `make_incc24_lexer` and `checkout_lexer` return from now on.
+    """
+    global kind
+
+    with pool_lock:
+        if name != kind:
+            kind = name
+            pool.clear()
+
+
 def make_incc24_lexer():
-    return lex.lex()
+    """
+    Return a new lexer independent of all others.
+    """
+    global prototype
+
+    selected = kind
+    if selected == 'scanner':
+        from lexer.scanner import Scanner
+        lexer = Scanner()
+    else:
+        with pool_lock:
+            if prototype is None:
+                # ply is only needed once something is actually lexed, cached syntax trees are loaded without it
+                from ply import lex
+                prototype = lex.lex()
+
+        lexer = prototype.clone()
+        lexer.lineno = 1
+
+    # lexers of the other kind are not pooled once they are given back
+    lexer.kind = selected
+    return lexer
+
+
+def checkout_lexer():
+    """
+    Return a lexer nobody else uses until it is given back with `release_lexer`.
+    """
+    with pool_lock:
+        lexer = pool.pop() if pool else None
+
+    if lexer is None:
+        return make_incc24_lexer()
+
+    lexer.lineno = 1
+    return lexer
 
 
-lexer = make_incc24_lexer()
+def release_lexer(lexer):
+    with pool_lock:
+        # the lexer may have been checked out before `select_lexer` switched to the other kind
+        if lexer.kind == kind:
+            pool.append(lexer)
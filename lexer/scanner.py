@@ -0,0 +1,119 @@
+import re
+import sys
+from collections import namedtuple
+from functools import partial
+from itertools import chain
+
+from lexer import lexer as rules
+
+
+class Token(namedtuple('Token', ['type', 'value', 'lineno', 'lexpos'])):
+    """
+    Token of the `Scanner`, a tuple with the attributes of a ply LexToken.
+    """
+    __slots__ = ()
+
+    # ply attaches the lexer to the token of a syntax error unless it already has one
+    lexer = None
+
+    def __repr__(self):
+        return f'LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})'
+
+
+def rule_patterns():
+    """
+    (name, regex) of all rules in `lexer.lexer` in the order ply tries them: function rules by their line, then string
+    rules from the longest regex to the shortest.
+    """
+    functions, strings = [], []
+    for name, rule in vars(rules).items():
+        if not name.startswith('t_') or name in ('t_ignore', 't_error'):
+            continue
+        if callable(rule):
+            functions.append((name[2:], rule.__doc__, rule.__code__.co_firstlineno))
+        else:
+            strings.append((name[2:], rule))
+
+    functions.sort(key=lambda rule: rule[2])
+    strings.sort(key=lambda rule: len(rule[1]), reverse=True)
+
+    patterns = [(name, regex) for name, regex, _ in functions]
+
+    # anything else but ignored characters ends the token stream with an error
+    return patterns + strings + [('error', '[^' + re.escape(rules.t_ignore) + ']')]
+
+
+# ignored characters are consumed in front of every match rather than as matches of their own
+master = re.compile(
+    '[' + re.escape(rules.t_ignore) + ']*(?:' + '|'.join(f'(?P<{name}>{regex})' for name, regex in rule_patterns()) + ')',
+    re.VERBOSE,
+)
+
+new_token = tuple.__new__
+intern = sys.intern
+
+# rules whose tokens are not just the matched text
+SPECIAL = {'newline', 'IDENT', 'STRING', 'CHAR', 'ignore_COMMENT', 'error'}
+
+reserved_words = rules.reserved_words
+
+
+def scan(data, lineno):
+    """
+    Tokenize all of `data` at once. Return the tokens, the line number after them and the error at the first illegal
+    character, if any.
+    """
+    tokens = []
+    append = tokens.append
+
+    for m in master.finditer(data):
+        kind = m.lastgroup
+        value = m[kind]
+
+        if kind not in SPECIAL:
+            append(new_token(Token, (kind, value, lineno, m.start(kind))))
+        elif kind == 'newline':
+            lineno += len(value)
+        elif kind == 'IDENT':
+            upper = value.upper()
+            if upper in reserved_words:
+                upper = intern(upper)
+                append(new_token(Token, (upper, upper, lineno, m.start(kind))))
+            else:
+                append(new_token(Token, (kind, intern(value), lineno, m.start(kind))))
+        elif kind == 'STRING' or kind == 'CHAR':
+            append(new_token(Token, (kind, value[1:-1], lineno, m.start(kind))))
+        elif kind == 'error':
+            return tokens, lineno, SyntaxError(f"Illegal character '{value}'")
+
+    return tokens, lineno, None
+
+
+def failing(error):
+    raise error
+    yield
+
+
+class Scanner:
+    """
+    Replacement for the ply lexer producing the same tokens from one precompiled regex, selected with
+    `lexer.lexer.select_lexer('scanner')`. The whole input is tokenized up front, the grammar has no empty productions
+    that would read the line of the lexer while parsing.
+    """
+
+    def __init__(self):
+        self.lexdata = ''
+        self.lexpos = 0
+        self.lineno = 1
+        self.token = partial(next, iter(()), None)
+
+    def input(self, data):
+        self.lexdata = data
+        self.lexpos = len(data)
+        tokens, self.lineno, error = scan(data, self.lineno)
+        # the parser fetches every token through this, so it stays a builtin call. An illegal character is raised once
+        # the parser gets to it, like the ply lexer does
+        self.token = partial(next, chain(tokens, failing(error)) if error is not None else iter(tokens), None)
+
+    def __iter__(self):
+        return iter(self.token, None)
@@ -0,0 +1,228 @@
+import operator
+import re
+
+from syntaxtree.controlflow import LoopExpression, WhileExpression, DoWhileExpression, IfExpression, RepeatExpression
+from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression
+from syntaxtree.functions import LambdaExpression, CallExpression, ProcedureExpression, ReturnExpression, QuitExpression
+from syntaxtree.module import ImportExpression
+from syntaxtree.operators import BinaryOperatorExpression, UnaryOperatorExpression
+from syntaxtree.sequences import SequenceExpression
+from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
+from syntaxtree.syntaxtree import Expression, TrapExpression, Program
+from syntaxtree.variables import AssignExpression, VariableExpression, LockExpression, LocalExpression
+
+
+def wrap_int64(val):
+    return (val + 2 ** 63) % 2 ** 64 - 2 ** 63
+
+
+def int_div(val0, val1):
+    # idiv truncates towards zero
+    q = abs(val0) // abs(val1)
+    return q if (val0 < 0) == (val1 < 0) else -q
+
+
+compiler_unary_operators = {
+    '-': operator.neg,
+}
+
+compiler_binary_operators = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': int_div,
+    '<': lambda val0, val1: int(val0 < val1),
+    '>': lambda val0, val1: int(val0 > val1),
+    '<=': lambda val0, val1: int(val0 <= val1),
+    '>=': lambda val0, val1: int(val0 >= val1),
+    '==': lambda val0, val1: int(val0 == val1),
+    '!=': lambda val0, val1: int(val0 != val1),
+}
+
+
+def operator_tables(backend):
+    match backend:
+        case 'interpreter':
+            from interpreter.operators import unary_operators, binary_operators
+            return unary_operators, binary_operators
+        case 'compiler':
+            return compiler_unary_operators, compiler_binary_operators
+        case _:
+            raise NotImplementedError(backend)
+
+
+def constant_value(expr, backend):
+    """
+    Return (True, value) if `expr` is a constant for `backend`, (False, None) otherwise.
+    """
+    match backend, expr:
+        case 'interpreter', ConstantExpression(_, value):
+            return True, value
+        case 'compiler', NumberLiteral(_, value) if re.fullmatch(r'-?\d+', value):
+            return True, int(value)
+        case _:
+            return False, None
+
+
+def make_constant(pos, value, backend):
+    match backend:
+        case 'interpreter':
+            return ConstantExpression(pos, value)
+        case 'compiler':
+            return NumberLiteral(pos, str(wrap_int64(value)))
+
+
+def is_true(value, backend):
+    return value != 0 if backend == 'compiler' else bool(value)
+
+
+def optimize(expr: Expression, backend: str = 'interpreter') -> Expression:
+    """
+    Return an optimized copy of `expr`: literals are converted to their runtime values, operators with constant operands
+    are folded, `if`s with a constant condition are replaced by the taken branch and nested sequences are flattened.
+
+    The interpreter engines consume `ConstantExpression`s and evaluate with python floats. The compiler backends only know
+    `NumberLiteral`s, so for backend='compiler' folding uses 64 bit integer semantics and produces `NumberLiteral`s.
+    """
+    unary_operators, binary_operators = operator_tables(backend)
+
+    def opt(expr):
+        match expr:
+            case None:
+                return None
+
+            case Program(pos, body):
+                return Program(pos, opt(body))
+
+            case NumberLiteral(pos, value) if backend == 'interpreter':
+                return ConstantExpression(pos, float(value))
+            case BoolLiteral(pos, value) if backend == 'interpreter':
+                return ConstantExpression(pos, value == 'TRUE')
+            case StringLiteral(pos, value) | CharLiteral(pos, value) if backend == 'interpreter':
+                return ConstantExpression(pos, value)
+            case NumberLiteral() | BoolLiteral() | StringLiteral() | CharLiteral() | ConstantExpression():
+                return expr
+
+            case ArrayLiteral(pos, elements):
+                return ArrayLiteral(pos, [opt(elem) for elem in elements])
+
+            case DictLiteral(pos, elements):
+                return DictLiteral(pos, [(opt(key), opt(value)) for key, value in elements])
+
+            case UnaryOperatorExpression(pos, op, operand):
+                operand = opt(operand)
+                is_const, val = constant_value(operand, backend)
+
+                if is_const and op in unary_operators:
+                    try:
+                        return make_constant(pos, unary_operators[op](val), backend)
+                    except Exception:
+                        pass
+
+                return UnaryOperatorExpression(pos, op, operand)
+
+            case BinaryOperatorExpression(pos, op, (left, right)):
+                left = opt(left)
+                right = opt(right)
+                is_const0, val0 = constant_value(left, backend)
+                is_const1, val1 = constant_value(right, backend)
+
+                if is_const0 and is_const1 and op in binary_operators:
+                    # leave errors like division by zero to runtime
+                    try:
+                        return make_constant(pos, binary_operators[op](val0, val1), backend)
+                    except Exception:
+                        pass
+
+                return BinaryOperatorExpression(pos, op, (left, right))
+
+            case AssignExpression(pos, var, expression):
+                return AssignExpression(pos, opt(var), opt(expression))
+
+            case VariableExpression(pos, name):
+                return VariableExpression(pos, name)
+
+            case LockExpression(pos, names, body):
+                return LockExpression(pos, names, opt(body))
+
+            case LocalExpression(pos, assignments, body):
+                return LocalExpression(pos, [opt(assignment) for assignment in assignments], opt(body))
+
+            case SequenceExpression(pos, expressions):
+                flat = []
+                for expression in expressions:
+                    match opt(expression):
+                        case SequenceExpression(_, inner):
+                            flat.extend(inner)
+                        case expression:
+                            flat.append(expression)
+
+                # constants are only interesting as the value of the sequence
+                flat = [expression for expression in flat[:-1] if not constant_value(expression, backend)[0]] + flat[-1:]
+
+                if len(flat) == 1:
+                    return flat[0]
+                return SequenceExpression(pos, flat)
+
+            case LoopExpression(pos, count, body):
+                return LoopExpression(pos, opt(count), opt(body))
+
+            case WhileExpression(pos, condition, body):
+                return WhileExpression(pos, opt(condition), opt(body))
+
+            case DoWhileExpression(pos, condition, body):
+                return DoWhileExpression(pos, opt(condition), opt(body))
+
+            case RepeatExpression(pos, body):
+                return RepeatExpression(pos, opt(body))
+
+            case IfExpression(pos, condition, then_body, else_body):
+                condition = opt(condition)
+                is_const, val = constant_value(condition, backend)
+
+                if not is_const:
+                    return IfExpression(pos, condition, opt(then_body), opt(else_body))
+                elif is_true(val, backend):
+                    return opt(then_body)
+                elif else_body:
+                    return opt(else_body)
+                else:
+                    return make_constant(pos, None if backend == 'interpreter' else 0, backend)
+
+            case LambdaExpression(pos, arg_names, body, rest_arg):
+                return LambdaExpression(pos, arg_names, opt(body), rest_arg)
+
+            case ProcedureExpression(pos, arg_names, local_names, body):
+                return ProcedureExpression(pos, arg_names, local_names, opt(body))
+
+            case CallExpression(pos, f, arg_exprs):
+                return CallExpression(pos, opt(f), [opt(arg_expr) for arg_expr in arg_exprs])
+
+            case ReturnExpression(pos, val):
+                return ReturnExpression(pos, opt(val))
+
+            case QuitExpression(pos, val):
+                return QuitExpression(pos, opt(val))
+
+            case StructExpression(pos, initializers, parent_expr):
+                return StructExpression(pos, [opt(initializer) for initializer in initializers], opt(parent_expr))
+
+            case MemberAccessExpression(pos, struct_expr, member, up_count):
+                return MemberAccessExpression(pos, opt(struct_expr), member, up_count)
+
+            case MemberAssignExpression(pos, member, value_expr):
+                return MemberAssignExpression(pos, member, opt(value_expr))
+
+            case ThisExpression(pos):
+                return ThisExpression(pos)
+
+            case ImportExpression(pos, path):
+                return ImportExpression(pos, path)
+
+            case TrapExpression(pos):
+                return TrapExpression(pos)
+
+            case _:
+                raise NotImplementedError(expr)
+
+    return opt(expr)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+
+from syntaxtree import serialize
+from syntaxtree.syntaxtree import Expression
+
+
+CACHE_DIR = '__incc24cache__'
+
+# set to False to neither read nor write cached syntax trees and compiled code
+enabled = True
+
+
+def source_digest(path: str, source: str, positions: bool = True, grammar: bytes = b'') -> bytes:
+    # positions contain the path, so the same source under another path needs its own tree, as does a tree without lines.
+    # A tree parsed with another grammar is stale even if the source is unchanged
+    mode = b'\0' if positions else b'\1'
+    return hashlib.sha256(grammar + path.encode() + mode + source.encode('utf-8', 'surrogatepass')).digest()
+
+
+def cache_path(path: str, suffix: str = '.ast') -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, name + suffix)
+
+
+def load(path: str, digest: bytes, suffix: str = '.ast', loads=serialize.loads) -> Expression | None:
+    """
+    Return the cached syntax tree of the source at `path` if it was stored for the same digest, None otherwise. Other
+    kinds of cached values are stored under another `suffix` and read by their own `loads`.
+    """
+    if not enabled:
+        return None
+
+    try:
+        with open(cache_path(path, suffix), 'rb') as f:
+            data = f.read()
+
+        if data[:len(digest)] != digest:
+            return None
+
+        return loads(data[len(digest):])
+    except (OSError, EOFError, ValueError, TypeError, IndexError, RecursionError):
+        return None
+
+
+def store(path: str, digest: bytes, expr: Expression, suffix: str = '.ast', dumps=serialize.dumps):
+    """
+    Write the syntax tree of the source at `path`, or another value serialized by `dumps`. The cache is an optimization
+    only, so failing to write it (e.g. in a read only directory) is ignored.
+    """
+    if not enabled:
+        return
+
+    try:
+        data = dumps(expr)
+    except (ValueError, RecursionError):
+        # a tree marshal cannot store is parsed again next time
+        return
+
+    target = cache_path(path, suffix)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(digest + data)
+        # readers see either the old or the new file, never a partial one
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
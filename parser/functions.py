@@ -1,3 +1,4 @@
+from parser.position import position
 from syntaxtree.functions import *
 from syntaxtree.variables import AssignExpression, LocalExpression, VariableExpression
 
@@ -5,23 +6,25 @@ from syntaxtree.variables import AssignExpression, LocalExpression, VariableExpr
 def p_ident_list(p):
     """
     ident_list : IDENT
-               | IDENT COMMA ident_list
+               | ident_list COMMA IDENT
     """
     if len(p) == 2:
         p[0] = [p[1]]
     else:
-        p[0] = [p[1], *p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 
 def p_expr_list(p):
     """
     expr_list : expression
-              | expression COMMA expr_list
+              | expr_list COMMA expression
     """
     if len(p) == 2:
         p[0] = [p[1]]
     else:
-        p[0] = [p[1], *p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 
 def p_expression_lambda(p):
@@ -32,11 +35,11 @@ def p_expression_lambda(p):
     """
     match len(p):
         case 4:
-            p[0] = LambdaExpression(p.linespan(0), [], p[3])
+            p[0] = LambdaExpression(position(p), [], p[3])
         case 5:
-            p[0] = LambdaExpression(p.linespan(0), p[2], p[4])
+            p[0] = LambdaExpression(position(p), p[2], p[4])
         case 8:
-            p[0] = LambdaExpression(p.linespan(0), p[2], p[7], True)
+            p[0] = LambdaExpression(position(p), p[2], p[7], True)
 
 
 def p_expression_function(p):
@@ -49,43 +52,43 @@ def p_expression_function(p):
     # => f := local f := \x -> body in f
     match len(p):
         case 5:
-            lmbd_expr = LambdaExpression(p.linespan(0), [], p[4])
+            lmbd_expr = LambdaExpression(position(p), [], p[4])
         case 6:
-            lmbd_expr = LambdaExpression(p.linespan(0), p[3], p[5])
+            lmbd_expr = LambdaExpression(position(p), p[3], p[5])
         case 9:
-            lmbd_expr = LambdaExpression(p.linespan(0), p[3], p[8], True)
+            lmbd_expr = LambdaExpression(position(p), p[3], p[8], True)
 
-    local_expr = LocalExpression(p.linespan(0), [AssignExpression(p.linespan(0), p[2], lmbd_expr)], VariableExpression(p.linespan(0), p[2]))
+    local_expr = LocalExpression(position(p), [AssignExpression(position(p), VariableExpression(position(p), p[2]), lmbd_expr)], VariableExpression(position(p), p[2]))
 
-    p[0] = AssignExpression(p.linespan(0), p[2], local_expr)
+    p[0] = AssignExpression(position(p), VariableExpression(position(p), p[2]), local_expr)
 
 
 def p_expression_proc0(p):
     """
     expression : PROC LPAREN ident_list RPAREN ident_list RIGHT_ARROW expression
     """
-    p[0] = ProcedureExpression(p.linespan(0), p[3], p[5], p[7])
+    p[0] = ProcedureExpression(position(p), p[3], p[5], p[7])
 
 
 def p_expression_proc1(p):
     """
     expression : PROC LPAREN RPAREN ident_list RIGHT_ARROW expression
     """
-    p[0] = ProcedureExpression(p.linespan(0), [], p[4], p[6])
+    p[0] = ProcedureExpression(position(p), [], p[4], p[6])
 
 
 def p_expression_proc2(p):
     """
     expression : PROC LPAREN ident_list RPAREN RIGHT_ARROW expression
     """
-    p[0] = ProcedureExpression(p.linespan(0), p[3], [], p[6])
+    p[0] = ProcedureExpression(position(p), p[3], [], p[6])
 
 
 def p_expression_proc3(p):
     """
     expression : PROC LPAREN RPAREN RIGHT_ARROW expression
     """
-    p[0] = ProcedureExpression(p.linespan(0), [], [], p[5])
+    p[0] = ProcedureExpression(position(p), [], [], p[5])
 
 
 def p_expression_call(p):
@@ -94,20 +97,20 @@ def p_expression_call(p):
                | expression LPAREN expr_list RPAREN
     """
     if len(p) == 4:
-        p[0] = CallExpression(p.linespan(0), p[1], [])
+        p[0] = CallExpression(position(p), p[1], [])
     else:
-        p[0] = CallExpression(p.linespan(0), p[1], p[3])
+        p[0] = CallExpression(position(p), p[1], p[3])
 
 
 def p_expression_ret(p):
     """
     expression : RETURN expression
     """
-    p[0] = ReturnExpression(p.linespan(0), p[2])
+    p[0] = ReturnExpression(position(p), p[2])
 
 
 def p_expression_quit(p):
     """
     expression : QUIT expression
     """
-    p[0] = QuitExpression(p.linespan(0), p[2])
\ No newline at end of file
+    p[0] = QuitExpression(position(p), p[2])
\ No newline at end of file
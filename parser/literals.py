@@ -1,3 +1,4 @@
+from parser.position import position
 from syntaxtree.literals import *
 
 
@@ -5,7 +6,7 @@ def p_expression_num_lit(p):
     """
     expression : NUMBER
     """
-    p[0] = NumberLiteral(p.linespan(0), p[1])
+    p[0] = NumberLiteral(position(p), p[1])
 
 
 def p_expression_bool_lit(p):
@@ -13,21 +14,21 @@ def p_expression_bool_lit(p):
     expression : TRUE
                | FALSE
     """
-    p[0] = BoolLiteral(p.linespan(0), p[1])
+    p[0] = BoolLiteral(position(p), p[1])
 
 
 def p_expression_str_lit(p):
     """
     expression : STRING
     """
-    p[0] = StringLiteral(p.linespan(0), p[1])
+    p[0] = StringLiteral(position(p), p[1])
 
 
 def p_expression_char_lit(p):
     """
     expression : CHAR
     """
-    p[0] = CharLiteral(p.linespan(0), p[1])
+    p[0] = CharLiteral(position(p), p[1])
 
 
 def p_expression_array_lit(p):
@@ -35,7 +36,7 @@ def p_expression_array_lit(p):
     expression : LBRACKET RBRACKET
                | LBRACKET expr_list RBRACKET
     """
-    p[0] = ArrayLiteral(p.linespan(0), [] if len(p) == 3 else p[2])
+    p[0] = ArrayLiteral(position(p), [] if len(p) == 3 else p[2])
 
 
 def p_kv_pair(p):
@@ -48,9 +49,13 @@ def p_kv_pair(p):
 def p_kv_pair_list(p):
     """
     kv_pair_list : kv_pair
-                 | kv_pair COMMA kv_pair_list
+                 | kv_pair_list COMMA kv_pair
     """
-    p[0] = [p[1]] if len(p) == 2 else [p[1], *p[3]]
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[1].append(p[3])
+        p[0] = p[1]
 
 
 def p_expression_dic_lit(p):
@@ -58,4 +63,4 @@ def p_expression_dic_lit(p):
     expression : LBRACE RBRACE
                | LBRACE kv_pair_list RBRACE
     """
-    p[0] = DictLiteral(p.linespan(0), [] if len(p) == 3 else p[2])
\ No newline at end of file
+    p[0] = DictLiteral(position(p), [] if len(p) == 3 else p[2])
\ No newline at end of file
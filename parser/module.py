@@ -1,3 +1,4 @@
+from parser.position import position
 from syntaxtree.module import ImportExpression
 
 
@@ -5,4 +6,4 @@ def p_module(p):
     """
     expression : IMPORT STRING
     """
-    p[0] = ImportExpression(p.linespan(0), p[2])
+    p[0] = ImportExpression(position(p), p[2])
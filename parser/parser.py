@@ -1,7 +1,16 @@
 # type: ignore
 # ignore name conflict
-from ply import yacc
-from lexer.lexer import tokens, lexer, make_incc24_lexer
+import copy
+import hashlib
+import marshal
+import os
+import threading
+import time
+
+from lexer.lexer import tokens, checkout_lexer, release_lexer
+from parser import cache
+from parser.position import position
+from syntaxtree.positions import intern_source, unknown_position
 
 from parser.literals import *
 from parser.operators import *
@@ -35,7 +44,7 @@ def p_program(p):
     """
     program : expression
     """
-    p[0] = Program(p.linespan(0), p[1])
+    p[0] = Program(position(p), p[1])
 
 
 def p_error(p):
@@ -46,108 +55,106 @@ def p_trap(p):
     """
     expression : TRAP
     """
-    p[0] = TrapExpression(p.linespan(0))
+    p[0] = TrapExpression(position(p))
 
 
-parser = yacc.yacc(start='program')
+start_symbol = 'program'
 
+# parse tables generated by ply, loaded without validating the grammar again as long as the grammar's signature matches
+TABLE_FILE = os.path.join(os.path.dirname(__file__), 'parsetab.pickle')
 
-def parse_expr(text: str) -> Expression:
-    return parser.parse(input=text, lexer=make_incc24_lexer(), tracking=True)
+parser = None
+parser_lock = threading.Lock()
+# seconds spent loading (or generating) the parse tables, None until the first parse
+table_load_time = None
 
 
-def parse_file(path: str) -> Expression:
-    def annotate_file(expr, path):
-        expr.position = (path, *expr.position)
-
-        match expr:
-            case Program(_, expr): annotate_file(expr, path)
-            case NumberLiteral(_, value): pass
-            case BoolLiteral(_, value): pass
-            case StringLiteral(_, value): pass
-            case CharLiteral(_, value): pass
-            case ArrayLiteral(_, elements):
-                for elem in elements:
-                    annotate_file(elem, path)
-            case DictLiteral(_, elements):
-                for key, value in elements:
-                    annotate_file(key, path)
-                    annotate_file(value, path)
-
-            case UnaryOperatorExpression(_, operator, operand):
-                annotate_file(operand, path)
-
-            case BinaryOperatorExpression(_, operator, operands):
-                annotate_file(operands[0], path)
-                annotate_file(operands[1], path)
-
-            case AssignExpression(_, var, expression):
-                annotate_file(var, path)
-                annotate_file(expression, path)
-
-            case VariableExpression(_, name): pass
-
-            case LockExpression(_, _, body):
-                annotate_file(body, path)
-
-            case LocalExpression(_, assignments, body):
-                for assignment in assignments:
-                    annotate_file(assignment, path)
-                annotate_file(body, path)
-
-            case SequenceExpression(_, expressions):
-                for expression in expressions:
-                    annotate_file(expression, path)
-
-            case LoopExpression(_, count, body):
-                annotate_file(count, path)
-                annotate_file(body, path)
-
-            case WhileExpression(_, condition, body):
-                annotate_file(condition, path)
-                annotate_file(body, path)
-
-            case DoWhileExpression(_, condition, body):
-                annotate_file(condition, path)
-                annotate_file(body, path)
-
-            case IfExpression(_, condition, then_body, else_body):
-                annotate_file(condition, path)
-                annotate_file(then_body, path)
-                if else_body: annotate_file(else_body, path)
-
-            case LambdaExpression(_, arg_names, body, rest_args):
-                annotate_file(body, path)
-
-            case ProcedureExpression(_, arg_names, local_names, body):
-                annotate_file(body, path)
-
-            case CallExpression(_, f, arg_exprs):
-                for arg_expr in arg_exprs:
-                    annotate_file(arg_expr, path)
-                annotate_file(f, path)
-
-            case StructExpression(_, initializers, parent_expr):
-                if parent_expr: annotate_file(parent_expr, path)
-                for initializer in initializers:
-                    annotate_file(initializer, path)
-
-            case MemberAccessExpression(_, expr, member, up_count):
-                annotate_file(expr, path)
-
-            case MemberAssignExpression(_, member, expr):
-                annotate_file(expr, path)
-
-            case ThisExpression(_): pass
-            case ImportExpression(_, path): pass
-            case TrapExpression(_): pass
-            case _:
-                raise NotImplementedError(expr)
+def get_parser():
+    global parser, table_load_time
+
+    if parser is None:
+        with parser_lock:
+            if parser is None:
+                start = time.perf_counter()
+                from ply import yacc
+                parser = yacc.yacc(start=start_symbol, debug=False, picklefile=TABLE_FILE)
+                table_load_time = time.perf_counter() - start
+
+    return parser
+
+
+def parser_for(lexer):
+    """
+    The parser used with `lexer`. A ply parser keeps the state of a parse in its attributes, so each pooled lexer gets
+    its own copy, which shares the parse tables with `get_parser()`.
+    """
+    lexer_parser = getattr(lexer, 'parser', None)
+    if lexer_parser is None:
+        lexer_parser = lexer.parser = copy.copy(get_parser())
+    return lexer_parser
+
+
+grammar_digest = None
+
+
+def get_grammar_digest() -> bytes:
+    """
+    Digest of the grammar rules, their actions and the precedence table, so cached syntax trees of an older grammar
+    are not loaded. Unlike the signature ply checks its tables against, it also changes with the code of the actions.
+    """
+    global grammar_digest
+
+    if grammar_digest is None:
+        h = hashlib.sha256(repr((start_symbol, sorted(tokens), precedence)).encode())
+        for name, rule in sorted(globals().items()):
+            if name.startswith('p_') and callable(rule):
+                # the file name depends on where the sources are installed, not on the grammar
+                h.update(marshal.dumps(rule.__code__.replace(co_filename='')))
+        grammar_digest = h.digest()
 
+    return grammar_digest
+
+
+# set to False to skip computing line spans, all nodes of a source then share one position without a line. Syntax
+# errors still report the line of the offending token
+track_positions = True
+
+
+def parse_expr(text: str, source: int = 0) -> Expression:
+    """
+    Parse `text`, the positions of all nodes refer to `source` in `syntaxtree.positions.sources`.
+    """
+    lexer = checkout_lexer()
+    try:
+        lexer.source = source
+        lexer.fixed_position = None if track_positions else unknown_position(source)
+        lexer.positions = {}
+        return parser_for(lexer).parse(input=text, lexer=lexer, tracking=track_positions)
+    finally:
+        lexer.positions = None
+        release_lexer(lexer)
+
+
+def file_digest(path: str, text: str) -> bytes:
+    """
+    Cache key of the syntax tree of the file at `path` containing `text`.
+    """
+    return cache.source_digest(path, text, track_positions, get_grammar_digest())
+
+
+def parse_file(path: str) -> Expression:
     with open(path) as f:
-        try:
-            expr = parse_expr(f.read())
-            annotate_file(expr, path)
-            return expr
-        except SyntaxError as e:
-            raise SyntaxError(e.msg + " in " + path)
\ No newline at end of file
+        text = f.read()
+
+    digest = file_digest(path, text)
+    expr = cache.load(path, digest)
+    if expr is not None:
+        return expr
+
+    try:
+        expr = parse_expr(text, intern_source(path))
+    except SyntaxError as e:
+        raise SyntaxError(e.msg + " in " + path)
+
+    cache.store(path, digest, expr)
+    return expr
\ No newline at end of file
@@ -0,0 +1,15 @@
+from syntaxtree.positions import make_position
+
+
+def position(p, n=0):
+    """
+    Packed position of symbol `n` of the production, the source was set on the lexer by the parse function. Without
+    line tracking this is the shared position set there instead.
+    """
+    if p.lexer.fixed_position is not None:
+        return p.lexer.fixed_position
+
+    line, end_line = p.linespan(n)
+    pos = make_position(p.lexer.source, line, end_line)
+    # the nodes on a line all refer to the same int, the table only lives as long as the parse
+    return p.lexer.positions.setdefault(pos, pos)
@@ -1,3 +1,4 @@
+from parser.position import position
 from syntaxtree.sequences import *
 
 
@@ -6,11 +7,15 @@ def p_expressions(p):
     sequence : sequence SEMICOLON expression
              | expression
     """
-    p[0] = [p[1]] if len(p) == 2 else [*p[1], p[3]]
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[1].append(p[3])
+        p[0] = p[1]
 
 
 def p_sequence(p):
     """
     expression : LBRACE sequence RBRACE
     """
-    p[0] = SequenceExpression(p.linespan(0), p[2])
+    p[0] = SequenceExpression(position(p), p[2])
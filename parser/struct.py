@@ -1,3 +1,4 @@
+from parser.position import position
 from syntaxtree.functions import LambdaExpression
 from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
 from syntaxtree.variables import VariableExpression
@@ -6,9 +7,13 @@ from syntaxtree.variables import VariableExpression
 def p_initializer_list(p):
     """
     initializer_list : initializer
-                     | initializer SEMICOLON initializer_list
+                     | initializer_list SEMICOLON initializer
     """
-    p[0] = p[1] if len(p) == 2 else [*p[1], *p[3]]
+    if len(p) == 2:
+        p[0] = p[1]
+    else:
+        p[1].extend(p[3])
+        p[0] = p[1]
 
 
 def p_initializer(p):
@@ -21,8 +26,8 @@ def p_initializer(p):
     else:
         x = p[2].name
         name = f'set_{x}'
-        set_lmbd = LambdaExpression(p.linespan(0), [x], MemberAssignExpression(p.linespan(0), x, VariableExpression(p.linespan(0), x)))
-        p[0] = [p[2], MemberAssignExpression(p.linespan(0), name, set_lmbd)]
+        set_lmbd = LambdaExpression(position(p), [x], MemberAssignExpression(position(p), x, VariableExpression(position(p), x)))
+        p[0] = [p[2], MemberAssignExpression(position(p), name, set_lmbd)]
 
 
 def p_expr_struct(p):
@@ -30,7 +35,7 @@ def p_expr_struct(p):
     expression : STRUCT LBRACE RBRACE
                | STRUCT LBRACE initializer_list RBRACE
     """
-    p[0] = StructExpression(p.linespan(0), [] if len(p) == 4 else p[3])
+    p[0] = StructExpression(position(p), [] if len(p) == 4 else p[3])
 
 
 def p_struct_extension(p):
@@ -38,7 +43,7 @@ def p_struct_extension(p):
     expression : EXTEND expression LBRACE RBRACE
                | EXTEND expression LBRACE initializer_list RBRACE
     """
-    p[0] = StructExpression(p.linespan(0), [] if len(p) == 5 else p[4], p[2])
+    p[0] = StructExpression(position(p), [] if len(p) == 5 else p[4], p[2])
 
 
 def p_dots(p):
@@ -58,9 +63,9 @@ def p_member_access(p):
                | expression dots IDENT
     """
     if len(p) == 3:
-        p[0] = MemberAccessExpression(p.linespan(0), ThisExpression(p.linespan(0)), p[2], p[1])
+        p[0] = MemberAccessExpression(position(p), ThisExpression(position(p)), p[2], p[1])
     else:
-        p[0] = MemberAccessExpression(p.linespan(0), p[1], p[3], p[2])
+        p[0] = MemberAccessExpression(position(p), p[1], p[3], p[2])
 
 
 def p_member_assign(p):
@@ -74,11 +79,11 @@ def p_member_assign(p):
         if p[1] != 0:
             raise SyntaxError(f"Syntax error at token '.'")
 
-        p[0] = MemberAssignExpression(p.linespan(0), p[2], p[4])
+        p[0] = MemberAssignExpression(position(p), p[2], p[4])
 
 
 def p_this(p):
     """
     expression : THIS
     """
-    p[0] = ThisExpression(p.linespan(0))
+    p[0] = ThisExpression(position(p))
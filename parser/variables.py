@@ -1,3 +1,4 @@
+from parser.position import position
 from syntaxtree.variables import *
 
 
@@ -5,7 +6,7 @@ def p_expression_variable(p):
     """
     expression : IDENT
     """
-    p[0] = VariableExpression(p.linespan(0), p[1])
+    p[0] = VariableExpression(position(p), p[1])
 
 
 def p_expression_assign(p):
@@ -13,29 +14,30 @@ def p_expression_assign(p):
     expression : assign_expression
     assign_expression : IDENT ASSIGN expression
     """
-    p[0] = p[1] if len(p) == 2 else AssignExpression(p.linespan(0), VariableExpression(p.linespan(1), p[1]), p[3])
+    p[0] = p[1] if len(p) == 2 else AssignExpression(position(p), VariableExpression(position(p, 1), p[1]), p[3])
 
 
 def p_assignment_list(p):
     """
     assignment_list : assign_expression
-                    | assign_expression COMMA assignment_list
+                    | assignment_list COMMA assign_expression
     """
     if len(p) == 2:
         p[0] = [p[1]]
     else:
-        p[0] = [p[1], *p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 
 def p_lock(p):
     """
     expression : LOCK ident_list IN expression
     """
-    p[0] = LockExpression(p.linespan(0), p[2], p[4])
+    p[0] = LockExpression(position(p), p[2], p[4])
 
 
 def p_let(p):
     """
     expression : LOCAL assignment_list IN expression
     """
-    p[0] = LocalExpression(p.linespan(0), p[2], p[4])
+    p[0] = LocalExpression(position(p), p[2], p[4])
@@ -2,31 +2,31 @@ from syntaxtree.syntaxtree import Expression
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class LoopExpression(Expression):
     count: Expression
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileExpression(Expression):
     condition: Expression
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class DoWhileExpression(Expression):
     condition: Expression
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class IfExpression(Expression):
     condition: Expression
     then_body: Expression
     else_body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class RepeatExpression(Expression):
     body: Expression
@@ -1,39 +1,44 @@
 from syntaxtree.syntaxtree import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class LambdaExpression(Expression):
     arg_names: list[str]
     body: Expression
     rest_arg: bool = False
+    layout: dict[str, int] = field(default=None, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionExpression(Expression):
     func_name: str
     arg_names: list[str]
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcedureExpression(Expression):
     arg_names: list[str]
     local_names: list[str]
     body: Expression
+    layout: dict[str, int] = field(default=None, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class CallExpression(Expression):
     f: Expression
     arg_exprs: list[Expression]
+    # interpreter.interpreter.CallCache, created on first evaluation
+    cache: Any = field(default=None, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnExpression(Expression):
     val: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class QuitExpression(Expression):
     val: Expression
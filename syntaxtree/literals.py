@@ -1,32 +1,39 @@
 from syntaxtree.syntaxtree import *
 from dataclasses import dataclass
+from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class NumberLiteral(Expression):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class BoolLiteral(Expression):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class StringLiteral(Expression):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CharLiteral(Expression):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ArrayLiteral(Expression):
     elements: list[Expression]
 
 
-@dataclass
+@dataclass(slots=True)
 class DictLiteral(Expression):
     elements: list[Tuple[Expression, Expression]]
+
+
+@dataclass(slots=True)
+class ConstantExpression(Expression):
+    # already converted runtime value, produced by the optimizer
+    value: Any
@@ -2,6 +2,6 @@ from dataclasses import dataclass
 from syntaxtree.syntaxtree import Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class ImportExpression(Expression):
     path: str
@@ -4,13 +4,13 @@ from typing import Tuple
 from syntaxtree.syntaxtree import Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOperatorExpression(Expression):
     operator: str
     operand: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOperatorExpression(Expression):
     operator: str
     operands: Tuple[Expression, Expression]
@@ -0,0 +1,50 @@
+"""
+Source positions of syntax tree nodes packed into a single int: the index of the source in the interned `sources`
+table, the first and the last line. They are only decoded for error messages and the debugger.
+"""
+
+LINE_BITS = 21
+LINE_MASK = (1 << LINE_BITS) - 1
+SOURCE_SHIFT = 2 * LINE_BITS
+
+# source 0 is text that was not read from a file, e.g. REPL input
+sources = ['<input>']
+source_ids = {'<input>': 0}
+
+def intern_source(path: str) -> int:
+    source = source_ids.get(path)
+    if source is None:
+        source = source_ids[path] = len(sources)
+        sources.append(path)
+    return source
+
+
+def make_position(source: int, line: int, end_line: int) -> int:
+    return source << SOURCE_SHIFT | min(line, LINE_MASK) << LINE_BITS | min(end_line, LINE_MASK)
+
+
+def position_source(pos: int) -> int:
+    return pos >> SOURCE_SHIFT
+
+
+def with_source(pos: int, source: int) -> int:
+    return source << SOURCE_SHIFT | pos & ((1 << SOURCE_SHIFT) - 1)
+
+
+def decode_position(pos: int) -> tuple[str, int, int]:
+    """
+    Return (path, line, end line) of `pos`.
+    """
+    return sources[pos >> SOURCE_SHIFT], pos >> LINE_BITS & LINE_MASK, pos & LINE_MASK
+
+
+def unknown_position(source: int) -> int:
+    """
+    Position shared by all nodes of `source` when it was parsed without tracking lines.
+    """
+    return source << SOURCE_SHIFT
+
+
+def format_position(pos: int) -> str:
+    path, line, _ = decode_position(pos)
+    return f'{path}:{line}' if line else path
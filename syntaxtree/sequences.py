@@ -2,6 +2,6 @@ from syntaxtree.syntaxtree import *
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class SequenceExpression(Expression):
     expressions: list[Expression]
@@ -0,0 +1,121 @@
+import marshal
+from dataclasses import fields
+
+from syntaxtree.controlflow import LoopExpression, WhileExpression, DoWhileExpression, IfExpression, RepeatExpression
+from syntaxtree.literals import NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression
+from syntaxtree.functions import LambdaExpression, FunctionExpression, ProcedureExpression, CallExpression, ReturnExpression, QuitExpression
+from syntaxtree.module import ImportExpression
+from syntaxtree.operators import BinaryOperatorExpression, UnaryOperatorExpression
+from syntaxtree.positions import sources, intern_source, position_source, with_source
+from syntaxtree.sequences import SequenceExpression
+from syntaxtree.struct import StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression
+from syntaxtree.syntaxtree import Expression, TrapExpression, Program
+from syntaxtree.variables import AssignExpression, VariableExpression, LockExpression, LocalExpression
+
+
+# the index of a node type is its tag in the serialized form, only append to this list
+NODE_TYPES = (
+    Program, TrapExpression,
+    NumberLiteral, BoolLiteral, StringLiteral, CharLiteral, ArrayLiteral, DictLiteral, ConstantExpression,
+    UnaryOperatorExpression, BinaryOperatorExpression,
+    AssignExpression, VariableExpression, LockExpression, LocalExpression,
+    SequenceExpression,
+    LoopExpression, WhileExpression, DoWhileExpression, IfExpression, RepeatExpression,
+    LambdaExpression, FunctionExpression, ProcedureExpression, CallExpression, ReturnExpression, QuitExpression,
+    StructExpression, MemberAccessExpression, MemberAssignExpression, ThisExpression,
+    ImportExpression,
+)
+
+NODE_TAGS = {node_type: tag for tag, node_type in enumerate(NODE_TYPES)}
+
+# syntactic fields only, annotations like resolved addresses and caches are left out
+NODE_FIELDS = tuple(tuple(f.name for f in fields(node_type) if f.compare) for node_type in NODE_TYPES)
+
+# bump whenever NODE_TYPES, a node's fields or the encoding change
+FORMAT_VERSION = 3
+
+# codes of the values that are not nodes, nodes are coded by their tag
+VALUE = -1
+LIST = -2
+TUPLE = -3
+
+
+def encode(expr: Expression, source_indices: dict[int, int]) -> tuple[list[int], list]:
+    """
+    Flatten a syntax tree into the values marshal can store without nesting, so trees of any depth can be cached. The
+    result is a postorder list of codes and a list with one argument per code: the position of a node, the length of a
+    list or tuple, or the value itself. Source ids are process local, so positions refer to sources by their index in
+    `source_indices` instead.
+    """
+    codes, args = [], []
+
+    # visits each value before its fields from the last to the first one, the reverse of that is a postorder
+    todo = [expr]
+    while todo:
+        value = todo.pop()
+        match value:
+            case Expression():
+                tag = NODE_TAGS[type(value)]
+                pos = value.position
+                if pos is not None:
+                    pos = with_source(pos, source_indices.setdefault(position_source(pos), len(source_indices)))
+                codes.append(tag)
+                args.append(pos)
+                todo.extend(getattr(value, name) for name in NODE_FIELDS[tag][1:])
+            case list():
+                codes.append(LIST)
+                args.append(len(value))
+                todo.extend(value)
+            case tuple():
+                codes.append(TUPLE)
+                args.append(len(value))
+                todo.extend(value)
+            case _:
+                codes.append(VALUE)
+                args.append(value)
+
+    codes.reverse()
+    args.reverse()
+    return codes, args
+
+
+def decode(codes: list[int], args: list, source_ids: list[int]) -> Expression:
+    stack = []
+    # the nodes on a line share one position like in a parsed tree
+    positions = {}
+    for code, arg in zip(codes, args):
+        if code == VALUE:
+            stack.append(arg)
+            continue
+
+        n = arg if code < 0 else len(NODE_FIELDS[code]) - 1
+        elems = stack[len(stack) - n:]
+        del stack[len(stack) - n:]
+
+        if code == LIST:
+            stack.append(elems)
+        elif code == TUPLE:
+            stack.append(tuple(elems))
+        else:
+            if arg is not None:
+                arg = with_source(arg, source_ids[position_source(arg)])
+                arg = positions.setdefault(arg, arg)
+            stack.append(NODE_TYPES[code](arg, *elems))
+
+    [expr] = stack
+    return expr
+
+
+def dumps(expr: Expression) -> bytes:
+    source_indices = {}
+    codes, args = encode(expr, source_indices)
+    return marshal.dumps((FORMAT_VERSION, [sources[source] for source in source_indices], codes, args))
+
+
+def loads(data: bytes) -> Expression:
+    version, *encoded = marshal.loads(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f'syntax tree format {version} is not supported, expected {FORMAT_VERSION}')
+
+    paths, codes, args = encoded
+    return decode(codes, args, [intern_source(path) for path in paths])
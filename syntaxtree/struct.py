@@ -1,28 +1,31 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any
 
 from syntaxtree.syntaxtree import Expression
 from syntaxtree.variables import AssignExpression
 
 
-@dataclass
+@dataclass(slots=True)
 class StructExpression(Expression):
     initializers: list[AssignExpression]
     parent_expr: Expression = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MemberAccessExpression(Expression):
     expr: Expression
     member: str
     up_count: int
+    # interpreter.structs.MemberCache, created on first evaluation
+    cache: Any = field(default=None, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class MemberAssignExpression(Expression):
     name: str
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class ThisExpression(Expression):
     pass
@@ -1,18 +1,19 @@
 from dataclasses import dataclass
 from typing import Tuple
 
-@dataclass
+@dataclass(slots=True)
 class Expression:
-    position: Tuple[int, int] | Tuple[str, int, int]
+    # packed source position, see syntaxtree.positions
+    position: int
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Program(Expression):
     expr: Expression
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class TrapExpression(Expression):
     pass
\ No newline at end of file
@@ -1,25 +1,28 @@
 from syntaxtree.syntaxtree import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignExpression(Expression):
     var: Expression
     expression: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableExpression(Expression):
     name: str
+    # (depth, slot) set by interpreter.resolver, slot is None for names not bound in an enclosing scope
+    address: Tuple[int, int | None] = field(default=None, compare=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class LockExpression(Expression):
     names: list[str]
     body: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class LocalExpression(Expression):
     assignments: list[AssignExpression]
     body: Expression
+    layout: dict[str, int] = field(default=None, compare=False, repr=False)
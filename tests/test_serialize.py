@@ -0,0 +1,36 @@
+from parser import cache
+from parser.parser import parse_expr
+from syntaxtree import serialize
+from syntaxtree.operators import BinaryOperatorExpression
+
+
+def deep_expression(terms):
+    return parse_expr(' + '.join(['1'] * terms))
+
+
+def test_round_trip():
+    expr = parse_expr('{ fun f x -> if x == 0 then 1 else x * f(x - 1); d = {"a": [1, 2]}; f(3) }')
+    assert serialize.loads(serialize.dumps(expr)) == expr
+
+
+def test_deep_expression():
+    # deeper than the recursion limit, comparing such trees with == would recurse as well
+    data = serialize.dumps(deep_expression(5000))
+    expr = serialize.loads(data).expr
+
+    depth = 0
+    while isinstance(expr, BinaryOperatorExpression):
+        expr = expr.operands[0]
+        depth += 1
+    assert depth == 4999
+    assert serialize.dumps(serialize.loads(data)) == data
+
+
+def test_cache_deep_expression(tmp_path):
+    path = str(tmp_path / 'deep.incc24')
+    expr = deep_expression(5000)
+
+    cache.store(path, b'digest', expr)
+    loaded = cache.load(path, b'digest')
+    assert loaded is not None
+    assert serialize.dumps(loaded) == serialize.dumps(expr)